@@ -0,0 +1,28 @@
+import asyncio
+import logging
+
+import db
+from db.messages.counters import backfill_message_counts
+from db.messages.words import backfill_word_counts
+
+
+async def main() -> None:
+    """
+    Одноразово заполняет дневные счётчики сообщений (message_counts_daily)
+    и частоты слов (word_counts) по уже сохранённым сообщениям.
+    Безопасно запускать повторно.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    try:
+        await db.init_db()
+        await backfill_message_counts()
+        await backfill_word_counts()
+    finally:
+        await db.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
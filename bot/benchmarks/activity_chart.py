@@ -0,0 +1,77 @@
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from datetime import date, timedelta
+
+from services import web
+from services.web.activity_chart import draw_activity_chart, make_activity_chart_html
+
+
+def _fake_stats(days: int) -> list[dict]:
+    """Строки в формате plot_user_activity."""
+    start = date.today() - timedelta(days=days)
+    return [
+        {"date": start + timedelta(days=i), "count": random.randint(0, 500)}
+        for i in range(days)
+    ]
+
+
+def _report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{name:<8} mean {statistics.mean(timings) * 1000:8.1f} ms | "
+        f"p50 {statistics.median(timings) * 1000:8.1f} ms | "
+        f"p95 {p95 * 1000:8.1f} ms"
+    )
+
+
+async def _measure(render, stats, runs: int) -> tuple[list[float], bytes]:
+    timings, image = [], b""
+    for _ in range(runs):
+        started = time.perf_counter()
+        image = await render(stats)
+        timings.append(time.perf_counter() - started)
+    return timings, image
+
+
+async def main() -> None:
+    """
+    Сравнивает рендер графика активности через Pillow и через браузер.
+    Запуск: python -m benchmarks.activity_chart [--runs N] [--days N] [--save]
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--days", type=int, default=96)
+    parser.add_argument("--save", action="store_true", help="сохранить оба изображения для сравнения")
+    args = parser.parse_args()
+
+    stats = _fake_stats(args.days)
+
+    native_timings, native_image = await _measure(
+        lambda s: asyncio.to_thread(draw_activity_chart, s), stats, args.runs
+    )
+    _report("pillow", native_timings)
+
+    await web.init_renderer()
+    try:
+        # Первый рендер прогревает страницу и в замер не входит
+        await make_activity_chart_html(stats)
+        html_timings, html_image = await _measure(make_activity_chart_html, stats, args.runs)
+    finally:
+        await web.close_renderer()
+    _report("browser", html_timings)
+
+    print(f"speedup  x{statistics.median(html_timings) / statistics.median(native_timings):.1f}")
+
+    if args.save:
+        with open("activity_chart_pillow.png", "wb") as f:
+            f.write(native_image)
+        with open("activity_chart_browser.png", "wb") as f:
+            f.write(html_image)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
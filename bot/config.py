@@ -24,7 +24,7 @@ WARNINGS_PICTURE_ID = "AgACAgIAAxkDAAM4aQ4h2qsd4nqp5LrvZ9CSMpyf2D0AAn8Laxsq9nlIW
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 with open(os.path.join(BASE_DIR, "resources", "russian_stopwords.json"), "r", encoding="utf-8") as f:
-    RUSSIAN_STOPWORDS = json.load(f)
+    RUSSIAN_STOPWORDS = frozenset(json.load(f))
 
 with open(os.path.join(BASE_DIR, "resources", "rp_commands.json"), "r") as f:
     RP_COMMANDS = json.load(f)
@@ -40,3 +40,77 @@ with open(os.path.join(BASE_DIR, "resources", "activity_chart.html"), "r", encod
 
 # Limits
 MAX_RP_COMMANDS_IN_CHAT_PER_USER = 15
+
+# Database
+DB_POOL_MAX_SIZE = 5  # Макс. кол-во соединений в пуле
+DB_SLOW_QUERY_THRESHOLD = 0.5  # Запросы дольше этого пишутся в лог как медленные (сек)
+DB_SLOW_ACQUIRE_THRESHOLD = 0.1  # Ожидание соединения дольше этого пишется в лог (сек)
+
+# Renderer
+RENDERER_POOL_SIZE = 3  # Кол-во прогретых страниц Chromium (и одновременных рендеров)
+RENDERER_MAX_RENDERS_PER_PAGE = 50  # После стольких рендеров страница пересоздаётся
+RENDERER_TIMEOUT = 10  # Таймаут операций со страницей (сек)
+ACTIVITY_CHART_NATIVE = True  # Рисовать график активности через Pillow (False — через браузер)
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Объём готовых картинок в памяти (байт)
+RENDER_CACHE_DIR = None  # Каталог для хранения картинок на диске (None — только в памяти)
+RENDER_CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024  # Объём картинок на диске (байт)
+RENDER_FILE_ID_CACHE_SIZE = 10000  # Кол-во запомненных file_id загруженных картинок
+
+# CPU
+CPU_EXECUTOR_WORKERS = 4  # Кол-во потоков для CPU-нагрузки (обработка картинок, токенизация)
+LOOP_LAG_INTERVAL = 0.5  # Как часто измерять лаг event loop (сек)
+LOOP_LAG_LOG_INTERVAL = 5 * 60  # Как часто писать лаг event loop и нагрузку пула в лог (сек)
+
+# Mailing
+MAILING_BATCH_SIZE = 500  # Сколько чатов рассылки читается из БД за раз (между чекпоинтами)
+MAILING_CONCURRENCY = 5  # Кол-во одновременных отправок рассылки
+
+# Call
+CALL_MENTIONS_PER_MESSAGE = 5  # Упоминаний в одном сообщении созыва (Telegram уведомляет только первых 5)
+CALL_RESOLVE_BATCH = 200  # Сколько участников созыва подготавливается за раз, пока идёт отправка
+CALL_PROGRESS_INTERVAL = 15  # Как часто обновлять сообщение с прогрессом созыва (сек)
+
+# Outbound
+OUTBOUND_GLOBAL_RATE = 25  # Макс. кол-во отправок в секунду на всего бота (лимит Telegram ~30)
+OUTBOUND_GROUP_RATE = 20 / 60  # Макс. кол-во отправок в секунду в одну группу (лимит Telegram 20 в минуту)
+OUTBOUND_GROUP_BURST = 20  # Сколько отправок в группу можно сделать подряд без ожидания
+OUTBOUND_PRIVATE_RATE = 1  # Макс. кол-во отправок в секунду в личный чат
+OUTBOUND_RETRIES = 3  # Кол-во повторов отправки после RetryAfter
+OUTBOUND_CHAT_BUCKETS = 10000  # Сколько лимитов чатов помнить, прежде чем выбросить лимиты простаивающих чатов
+
+# Scheduler
+SCHEDULER_RESYNC_INTERVAL = 10 * 60  # Как часто перечитывать все дедлайны из БД (сек)
+SCHEDULER_RETRY_DELAY = 60  # Через сколько повторить задачу, завершившуюся ошибкой (сек)
+CLEANING_CONCURRENCY = 5  # Сколько чатов одновременно готовят отчёт автоочистки (запросы к БД)
+
+# Ingestion
+INGESTION_BATCH_SIZE = 500  # Макс. кол-во сообщений в одной пачке записи
+INGESTION_FLUSH_INTERVAL = 1.0  # Макс. задержка записи сообщения в БД (сек)
+INGESTION_QUEUE_SIZE = 10000  # Размер очереди, после которого приём сообщений ждёт записи
+WORD_COUNTS_TOP_K = 100  # Сколько самых частых слов хранится на пользователя в чате
+WORD_COUNTS_PRUNE_INTERVAL = 6 * 60 * 60  # Как часто обрезать частоты слов до WORD_COUNTS_TOP_K (сек)
+
+# Downloads
+MAX_MEDIA_FILE_SIZE = 10 * 1024 * 1024  # Макс. размер скачиваемого медиа (байт)
+FETCH_TIMEOUT = 30  # Таймаут скачивания одного файла (сек)
+FETCH_RETRIES = 3  # Кол-во попыток скачивания при сетевых ошибках
+FETCH_CONNECTIONS_LIMIT = 20  # Макс. кол-во одновременных соединений к серверу файлов
+QUOTE_MEDIA_SIZE = 500  # Макс. сторона медиа в цитате (пикс.; 250px в шаблоне x device_scale_factor)
+QUOTE_AVATAR_SIZE = 100  # Сторона аватарки в цитате (пикс.; 50px в шаблоне x device_scale_factor)
+QUOTE_FETCH_CONCURRENCY = 6  # Макс. кол-во одновременных скачиваний при сборке одной цитаты
+MEDIA_CACHE_MAX_BYTES = 128 * 1024 * 1024  # Объём скачанных медиа и аватарок в памяти (байт)
+MEDIA_CACHE_DIR = None  # Каталог для хранения скачанных файлов на диске (None — только в памяти)
+MEDIA_CACHE_DISK_MAX_BYTES = 1024 * 1024 * 1024  # Объём скачанных файлов на диске (байт)
+MEDIA_FILE_ID_CACHE_SIZE = 50000  # Кол-во запомненных соответствий file_id -> file_unique_id
+AVATAR_CACHE_SIZE = 10000  # Кол-во пользователей, для которых помним текущую аватарку
+AVATAR_CACHE_TTL = 60 * 60  # Через сколько перепроверять аватарку пользователя (сек)
+
+# Caches
+USER_CACHE_SIZE = 50000  # Кол-во пользователей, для которых помним последний записанный username
+USER_CACHE_TTL = 60 * 60  # Время жизни записи (сек)
+LEADERBOARD_SNAPSHOT_TTL = 60  # Время жизни снимка топа чата (сек)
+CHAT_MEMBER_CACHE_SIZE = 50000  # Кол-во закэшированных участников чатов
+CHAT_MEMBER_CACHE_TTL = 5 * 60  # Время жизни данных участника (сек)
+CHAT_MEMBER_NEGATIVE_CACHE_TTL = 60  # Время жизни записи "участник не найден" (сек)
+RP_COMMANDS_CACHE_SIZE = 5000  # Кол-во чатов, для которых держим кастомные РП команды в памяти
+RP_COMMANDS_CACHE_TTL = 10 * 60  # Время жизни РП команд чата в памяти (сек)
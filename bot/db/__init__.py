@@ -1,3 +1,4 @@
+import time
 import logging
 from contextlib import asynccontextmanager
 from typing import Any, Optional
@@ -5,7 +6,9 @@ from typing import Any, Optional
 import asyncpg
 from asyncpg import Pool
 
-from config import DATABASE_URL
+from config import DATABASE_URL, DB_POOL_MAX_SIZE
+from utils import metrics
+from db.query_stats import query_stats, caller_name, rows_affected
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +27,7 @@ async def init_db() -> None:
     pool = await asyncpg.create_pool(
         DATABASE_URL,
         min_size=1,
-        max_size=5,
+        max_size=DB_POOL_MAX_SIZE,
         command_timeout=100  # Таймаут для долгих запросов
     )
     logger.info("✅ Pool соединений с БД создан")
@@ -63,8 +66,54 @@ async def connection():
             "Пул соединений с БД не инициализирован. "
             "Вызовите init_db() сначала."
         )
-    async with pool.acquire() as conn:
-        yield conn
+    started = time.perf_counter()
+    acquired = False
+    query_stats.acquire_started()
+    try:
+        async with pool.acquire() as conn:
+            acquired = True
+            query_stats.acquire_finished(time.perf_counter() - started, acquired=True)
+            try:
+                yield conn
+            finally:
+                query_stats.released()
+    finally:
+        if not acquired:
+            query_stats.acquire_finished(time.perf_counter() - started, acquired=False)
+        # Время в БД (с ожиданием соединения) учитывается в метриках апдейта
+        metrics.add_db_time(time.perf_counter() - started)
+
+
+async def _run(method: str, query: str, args: tuple) -> Any:
+    """
+    Выполняет метод соединения и записывает статистику запроса.
+
+    Args:
+        method: Имя метода asyncpg.Connection (fetch, fetchrow, fetchval, execute).
+        query: SQL-запрос.
+        args: Параметры для запроса.
+
+    Returns:
+        Результат метода соединения.
+    """
+    name = caller_name()
+    async with connection() as conn:
+        started = time.perf_counter()
+        try:
+            result = await getattr(conn, method)(query, *args)
+        except Exception as e:
+            query_stats.record(name, query, args, time.perf_counter() - started, error=e)
+            raise
+        elapsed = time.perf_counter() - started
+
+    if method == "fetch":
+        rows = len(result)
+    elif method == "execute":
+        rows = rows_affected(result)
+    else:
+        rows = int(result is not None)
+    query_stats.record(name, query, args, elapsed, rows=rows)
+    return result
 
 
 async def fetchmany(query: str, *args: Any) -> list[dict]:
@@ -78,9 +127,8 @@ async def fetchmany(query: str, *args: Any) -> list[dict]:
     Returns:
         Список словарей с результатами запроса.
     """
-    async with connection() as conn:
-        rows = await conn.fetch(query, *args)
-        return [dict(r) for r in rows]
+    rows = await _run("fetch", query, args)
+    return [dict(r) for r in rows]
 
 
 async def fetchone(query: str, *args: Any) -> Optional[dict]:
@@ -94,9 +142,8 @@ async def fetchone(query: str, *args: Any) -> Optional[dict]:
     Returns:
         Словарь с записью или None, если запись не найдена.
     """
-    async with connection() as conn:
-        row = await conn.fetchrow(query, *args)
-        return dict(row) if row else None
+    row = await _run("fetchrow", query, args)
+    return dict(row) if row else None
 
 
 async def fetchval(query: str, *args: Any) -> Any:
@@ -110,9 +157,8 @@ async def fetchval(query: str, *args: Any) -> Any:
     Returns:
         Значение первого столбца первой строки или None.
     """
-    async with connection() as conn:
-        val = await conn.fetchval(query, *args)
-        return val or None
+    val = await _run("fetchval", query, args)
+    return val or None
 
 
 async def case(query: str, *args: Any) -> bool:
@@ -126,9 +172,8 @@ async def case(query: str, *args: Any) -> bool:
     Returns:
         True если запрос вернул результат, иначе False.
     """
-    async with connection() as conn:
-        val = await conn.fetchval(query, *args)
-        return bool(val)
+    val = await _run("fetchval", query, args)
+    return bool(val)
 
 
 async def count(query: str, *args: Any) -> int:
@@ -142,22 +187,29 @@ async def count(query: str, *args: Any) -> int:
     Returns:
         Количество записей.
     """
-    async with connection() as conn:
-        val = await conn.fetchval(query, *args)
-        return val or 0
+    val = await _run("fetchval", query, args)
+    return val or 0
 
 
 @asynccontextmanager
 async def transaction():
     """
     Асинхронный контекстный менеджер для транзакции.
+    В статистику транзакция попадает целиком, под именем вызвавшей функции.
 
     Yields:
         Соединение с активной транзакцией.
     """
+    name = caller_name()
     async with connection() as conn:
-        async with conn.transaction():
-            yield conn
+        started = time.perf_counter()
+        try:
+            async with conn.transaction():
+                yield conn
+        except Exception as e:
+            query_stats.record(name, "TRANSACTION", (), time.perf_counter() - started, error=e)
+            raise
+        query_stats.record(name, "TRANSACTION", (), time.perf_counter() - started)
 
 
 async def execute(query: str, *args: Any) -> str:
@@ -171,8 +223,7 @@ async def execute(query: str, *args: Any) -> str:
     Returns:
         Результат выполнения запроса.
     """
-    async with connection() as conn:
-        return await conn.execute(query, *args)
+    return await _run("execute", query, args)
 
 
 async def _create_tables(conn: asyncpg.Connection) -> None:
@@ -288,6 +339,53 @@ async def _create_tables(conn: asyncpg.Connection) -> None:
 
         CREATE INDEX IF NOT EXISTS idx_messages_date
             ON messages(date DESC);
+
+        CREATE INDEX IF NOT EXISTS idx_messages_chat_date
+            ON messages(chat_id, date);
+    """)
+
+    # Дневные счётчики сообщений (ведутся при записи сообщений)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS message_counts_daily (
+            chat_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            day DATE NOT NULL,
+            count INT NOT NULL,
+            first_at TIMESTAMPTZ NOT NULL,
+            last_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (chat_id, user_id, day),
+
+            -- Связи
+            CONSTRAINT message_counts_daily_chat_fk
+                FOREIGN KEY (chat_id)
+                REFERENCES chats(chat_id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_message_counts_daily_chat_day
+            ON message_counts_daily(chat_id, day);
+    """)
+
+    # Частоты слов пользователей (ведутся при записи сообщений)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS word_counts (
+            chat_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            word TEXT NOT NULL,
+            count INT NOT NULL,
+            PRIMARY KEY (chat_id, user_id, word),
+
+            -- Связи
+            CONSTRAINT word_counts_chat_fk
+                FOREIGN KEY (chat_id)
+                REFERENCES chats(chat_id)
+                ON DELETE CASCADE
+                ON UPDATE CASCADE
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_word_counts_top
+            ON word_counts(chat_id, user_id, count DESC);
     """)
 
     # Цитаты
@@ -388,6 +486,34 @@ async def _create_tables(conn: asyncpg.Connection) -> None:
                 REFERENCES users(chat_id, user_id)
                 ON DELETE CASCADE
         );
+
+        CREATE INDEX IF NOT EXISTS idx_rests_valid_until
+            ON rests(valid_until);
+    """)
+
+    # Рассылки и их доставка по чатам
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id BIGSERIAL PRIMARY KEY,
+            file_id TEXT NOT NULL,
+            caption TEXT NULL,
+            created_at TIMESTAMPTZ NOT NULL,
+            finished_at TIMESTAMPTZ DEFAULT NULL,
+            last_chat_id BIGINT DEFAULT NULL -- Чекпоинт: до какого chat_id рассылка пройдена
+        );
+
+        CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+            broadcast_id BIGINT NOT NULL,
+            chat_id BIGINT NOT NULL,
+            status TEXT NOT NULL, -- sent | dead | failed
+            PRIMARY KEY (broadcast_id, chat_id),
+
+            -- Связи (без связи с chats: мёртвые чаты удаляются, а история доставки остаётся)
+            CONSTRAINT broadcast_deliveries_broadcast_fk
+                FOREIGN KEY (broadcast_id)
+                REFERENCES broadcasts(id)
+                ON DELETE CASCADE
+        );
     """)
 
     # Кастомные РП команды
@@ -0,0 +1,105 @@
+import db
+from datetime import datetime, timezone
+
+async def get_or_create_broadcast(file_id: str, caption: str | None) -> dict:
+    """
+    Возвращает незавершённую рассылку с таким же содержимым (чтобы продолжить её),
+    либо создаёт новую.
+    """
+    broadcast = await db.fetchone(
+        """
+        SELECT id, last_chat_id
+        FROM broadcasts
+        WHERE finished_at IS NULL
+            AND file_id = $1
+            AND caption IS NOT DISTINCT FROM $2
+        ORDER BY id DESC
+        LIMIT 1;
+        """, file_id, caption
+    )
+    if broadcast:
+        return {'id': int(broadcast['id']), 'last_chat_id': broadcast['last_chat_id'], 'resumed': True}
+
+    broadcast_id = await db.fetchval(
+        """
+        INSERT INTO broadcasts (file_id, caption, created_at)
+        VALUES ($1, $2, $3)
+        RETURNING id;
+        """, file_id, caption, datetime.now(timezone.utc)
+    )
+    return {'id': int(broadcast_id), 'last_chat_id': None, 'resumed': False}
+
+async def count_pending_chats(broadcast_id: int) -> int:
+    """Количество чатов, в которые рассылка ещё не доставлялась."""
+    return await db.count(
+        """
+        SELECT COUNT(*)
+        FROM chats c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM broadcast_deliveries d
+            WHERE d.broadcast_id = $1 AND d.chat_id = c.chat_id
+        );
+        """, broadcast_id
+    )
+
+async def fetch_pending_chats(broadcast_id: int, after_chat_id: int | None, limit: int) -> list[int]:
+    """Следующая пачка чатов по возрастанию chat_id (keyset), без уже обработанных."""
+    rows = await db.fetchmany(
+        """
+        SELECT c.chat_id
+        FROM chats c
+        WHERE ($2::BIGINT IS NULL OR c.chat_id > $2)
+            AND NOT EXISTS (
+                SELECT 1 FROM broadcast_deliveries d
+                WHERE d.broadcast_id = $1 AND d.chat_id = c.chat_id
+            )
+        ORDER BY c.chat_id
+        LIMIT $3;
+        """, broadcast_id, after_chat_id, limit
+    )
+    return [int(row['chat_id']) for row in rows]
+
+async def record_delivery(broadcast_id: int, chat_id: int, status: str):
+    """Запоминает результат доставки рассылки в чат (sent, dead или failed)."""
+    await db.execute(
+        """
+        INSERT INTO broadcast_deliveries (broadcast_id, chat_id, status)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (broadcast_id, chat_id) DO UPDATE SET
+            status = EXCLUDED.status;
+        """, broadcast_id, chat_id, status
+    )
+
+async def save_checkpoint(broadcast_id: int, last_chat_id: int):
+    """Сохраняет, до какого chat_id рассылка пройдена."""
+    await db.execute(
+        "UPDATE broadcasts SET last_chat_id = $2 WHERE id = $1;",
+        broadcast_id, last_chat_id
+    )
+
+async def get_dead_chats(broadcast_id: int) -> list[int]:
+    """Чаты, в которые рассылку доставить невозможно (бот удалён или заблокирован)."""
+    rows = await db.fetchmany(
+        """
+        SELECT chat_id
+        FROM broadcast_deliveries
+        WHERE broadcast_id = $1 AND status = 'dead';
+        """, broadcast_id
+    )
+    return [int(row['chat_id']) for row in rows]
+
+async def finish_broadcast(broadcast_id: int) -> dict[str, int]:
+    """Отмечает рассылку завершённой и возвращает количество доставок по статусам."""
+    await db.execute(
+        "UPDATE broadcasts SET finished_at = $2 WHERE id = $1;",
+        broadcast_id, datetime.now(timezone.utc)
+    )
+    rows = await db.fetchmany(
+        """
+        SELECT status, COUNT(*) AS count
+        FROM broadcast_deliveries
+        WHERE broadcast_id = $1
+        GROUP BY status;
+        """, broadcast_id
+    )
+    return {row['status']: int(row['count']) for row in rows}
@@ -1,4 +1,8 @@
 import db
+from db.users import invalidate_user_cache, invalidate_chats_user_cache
+from db.users.rp_commands import (
+    invalidate_rp_commands_cache, invalidate_chats_rp_commands_cache, refresh_rp_commands
+)
 
 async def add_chat(chat_id: int):
     """Добавляем чат в датабазу."""
@@ -19,6 +23,9 @@ async def migrate_chat(old_chat_id: int, new_chat_id):
         WHERE chat_id = $1
         """, old_chat_id, new_chat_id
     )
+    invalidate_user_cache(old_chat_id)
+    invalidate_rp_commands_cache(old_chat_id)
+    await refresh_rp_commands(new_chat_id)
 
 async def forget_chat(chat_id: int):
     """Удаляем чат из датабазы."""
@@ -28,6 +35,24 @@ async def forget_chat(chat_id: int):
         WHERE chat_id = $1;
         """, chat_id
     )
+    invalidate_user_cache(chat_id)
+    invalidate_rp_commands_cache(chat_id)
+
+async def forget_chats(chat_ids: list[int]):
+    """Удаляем сразу несколько чатов из датабазы."""
+    if not chat_ids:
+        return
+
+    await db.execute(
+        """
+        DELETE FROM chats
+        WHERE chat_id = ANY($1::BIGINT[]);
+        """, chat_ids
+    )
+    # Каждый кэш чистим одним проходом, а не отдельным проходом на каждый чат
+    forgotten = set(chat_ids)
+    invalidate_chats_user_cache(forgotten)
+    invalidate_chats_rp_commands_cache(forgotten)
 
 async def get_all_chat_ids():
     """Получаем айди всех чатов из датабазы."""
@@ -1,26 +1,49 @@
 import db
 from datetime import datetime, timezone, timedelta
 
+from db.messages.counters import day_bounds
+
 async def fetch_chats_for_scheduled_cleaning() -> list[int]:
     """
     Получаем список чатов, в которых пришло время провести чистку,
     с учётом дня недели и времени.
+    Время считается в UTC, как и дедлайны планировщика (next_cleaning_time),
+    независимо от часового пояса сессии БД.
     """
     rows = await db.fetchmany(
         """
+        WITH now_utc AS (
+            SELECT (NOW() AT TIME ZONE 'UTC') AS ts
+        )
         SELECT chat_id
-        FROM chats
+        FROM chats, now_utc
         WHERE autoclean_enabled = true
-            AND cleaning_day_of_week = EXTRACT(ISODOW FROM CURRENT_DATE)
-            AND cleaning_time <= CURRENT_TIME
+            AND cleaning_day_of_week = EXTRACT(ISODOW FROM now_utc.ts)
+            AND cleaning_time <= now_utc.ts::time
             AND (
                 last_auto_cleaning_at IS NULL
-                OR last_auto_cleaning_at::date < CURRENT_DATE
+                OR (last_auto_cleaning_at AT TIME ZONE 'UTC')::date < now_utc.ts::date
             );
         """
     )
     return [row["chat_id"] for row in rows]
 
+async def fetch_auto_cleaning_schedules() -> list[dict]:
+    """Возвращает расписание автоочистки всех чатов, где она включена."""
+    rows = await db.fetchmany(
+        """
+        SELECT chat_id, cleaning_day_of_week, cleaning_time, last_auto_cleaning_at
+        FROM chats
+        WHERE autoclean_enabled = true;
+        """
+    )
+    return [{
+        "chat_id": int(row["chat_id"]),
+        "day_of_week": row["cleaning_day_of_week"],
+        "time": row["cleaning_time"],
+        "last_cleaning_at": row["last_auto_cleaning_at"],
+    } for row in rows]
+
 async def update_last_cleaning_time(chat_id: int):
     await db.execute(
         """
@@ -57,10 +80,10 @@ async def check_cleaning_accuracy(chat_id: int) -> bool:
     query = """
     SELECT
         CASE
-            WHEN MIN(date) <= $1 THEN TRUE
+            WHEN MIN(first_at) <= $1 THEN TRUE
             ELSE FALSE
         END AS week_passed
-    FROM messages
+    FROM message_counts_daily
     WHERE chat_id = $2;
     """
     cleaning_possibility = await db.case(query, week_ago, chat_id)
@@ -90,27 +113,35 @@ async def minmsg_users(chat_id: int, min_messages: int, page: int, per_page: int
     limit = per_page + 1 # Берём на 1 больше, чтобы смотреть есть след. страница или нет
     offset = per_page * (page - 1)
 
+    # Целые дни берём из счётчиков, неполный первый день — из самих сообщений
+    first_full_day, first_full_day_start = day_bounds(cutoff_date)
+
     query = """
-        WITH first_message_dates AS (
-            SELECT 
-                chat_id, 
-                sender_user_id,
-                MIN(date) AS first_message_date
+        WITH daily AS (
+            SELECT
+                user_id,
+                SUM(count) FILTER (WHERE day >= $8) AS full_days_count,
+                MIN(first_at) AS first_message_date
+            FROM message_counts_daily
+            WHERE chat_id = $2
+            GROUP BY user_id
+        ),
+        partial_day AS (
+            SELECT sender_user_id AS user_id, COUNT(*) AS partial_count
             FROM messages
             WHERE chat_id = $2
-            GROUP BY chat_id, sender_user_id
+            AND date >= $3
+            AND date < $9
+            GROUP BY sender_user_id
         )
         SELECT 
             u.user_id AS sender_user_id,
-            COUNT(m.message_id) AS message_count
+            COALESCE(d.full_days_count, 0) + COALESCE(p.partial_count, 0) AS message_count
         FROM users u
-        LEFT JOIN messages m
-            ON m.sender_user_id = u.user_id
-            AND m.chat_id = u.chat_id
-            AND m.date >= $3
-        LEFT JOIN first_message_dates fmd
-            ON fmd.chat_id = u.chat_id
-            AND fmd.sender_user_id = u.user_id
+        LEFT JOIN daily d
+            ON d.user_id = u.user_id
+        LEFT JOIN partial_day p
+            ON p.user_id = u.user_id
         LEFT JOIN rests r
             ON r.chat_id = u.chat_id
             AND r.user_id = u.user_id
@@ -118,11 +149,10 @@ async def minmsg_users(chat_id: int, min_messages: int, page: int, per_page: int
         WHERE u.chat_id = $2
         AND r.user_id IS NULL        -- Пользователи без активного рестa
         AND (
-                fmd.first_message_date IS NULL
-                OR fmd.first_message_date <= $4
+                d.first_message_date IS NULL
+                OR d.first_message_date <= $4
             )
-        GROUP BY u.user_id
-        HAVING COUNT(m.message_id) < $5
+        AND COALESCE(d.full_days_count, 0) + COALESCE(p.partial_count, 0) < $5
         ORDER BY message_count DESC
         LIMIT $6 OFFSET $7;
     """
@@ -135,7 +165,9 @@ async def minmsg_users(chat_id: int, min_messages: int, page: int, per_page: int
         min_activity_age,
         min_messages,
         limit,
-        offset
+        offset,
+        first_full_day,
+        first_full_day_start
     )
     if rows:  # проверяем, что список не пуст
         if len(rows) == limit:
@@ -173,11 +205,11 @@ async def inactive_users(chat_id: int, duration: timedelta, page: int, per_page:
     query = """
         SELECT 
             u.user_id,
-            MAX(m.date) AS last_message_date
+            MAX(m.last_at) AS last_message_date
         FROM users u
-        LEFT JOIN messages m
+        LEFT JOIN message_counts_daily m
             ON m.chat_id = u.chat_id
-            AND m.sender_user_id = u.user_id
+            AND m.user_id = u.user_id
         LEFT JOIN rests r
             ON r.chat_id = u.chat_id
             AND r.user_id = u.user_id
@@ -187,7 +219,7 @@ async def inactive_users(chat_id: int, duration: timedelta, page: int, per_page:
             AND r.user_id IS NULL      -- только пользователи без активного рестa
         GROUP BY u.user_id
         HAVING 
-            COALESCE(MAX(m.date), '1970-01-01') < $3
+            COALESCE(MAX(m.last_at), '1970-01-01') < $3
         ORDER BY last_message_date ASC
         LIMIT $4 OFFSET $5;
     """
@@ -251,20 +283,43 @@ async def do_cleaning(chat_id: int, page: int, per_page: int = 20):
     inactive_cutoff = now_dt - cleaning_data["cleaning_max_inactive"]
     min_messages = cleaning_data["cleaning_min_messages"]
 
+    # Целые дни окна lookback берём из счётчиков, неполный первый день — из самих сообщений
+    lookback_full_day, lookback_full_day_start = day_bounds(lookback_cutoff)
+
     # 3. Единый запрос
     query = """
+        WITH daily AS (
+            SELECT
+                user_id,
+                -- Сообщения за целые дни внутри окна lookback
+                SUM(count) FILTER (WHERE day >= $9) AS full_days_count,
+                -- Дата самого последнего сообщения вообще
+                MAX(last_at) AS last_message_date,
+                -- Дата самого первого сообщения (для проверки "новичек или нет")
+                MIN(first_at) AS first_message_date
+            FROM message_counts_daily
+            WHERE chat_id = $1
+            GROUP BY user_id
+        ),
+        partial_day AS (
+            -- Сообщения за неполный первый день окна lookback
+            SELECT sender_user_id AS user_id, COUNT(*) AS partial_count
+            FROM messages
+            WHERE chat_id = $1
+            AND date >= $3
+            AND date < $10
+            GROUP BY sender_user_id
+        )
         SELECT 
             u.user_id,
-            -- Считаем сообщения только внутри окна lookback
-            COUNT(CASE WHEN m.date >= $3 THEN 1 END) AS recent_message_count,
-            -- Находим дату самого последнего сообщения вообще
-            MAX(m.date) AS last_message_date,
-            -- Находим дату самого первого сообщения (для проверки "новичек или нет")
-            MIN(m.date) AS first_message_date
+            COALESCE(d.full_days_count, 0) + COALESCE(p.partial_count, 0) AS recent_message_count,
+            d.last_message_date,
+            d.first_message_date
         FROM users u
-        LEFT JOIN messages m
-            ON m.sender_user_id = u.user_id
-            AND m.chat_id = u.chat_id
+        LEFT JOIN daily d
+            ON d.user_id = u.user_id
+        LEFT JOIN partial_day p
+            ON p.user_id = u.user_id
         LEFT JOIN rests r
             ON r.chat_id = u.chat_id
             AND r.user_id = u.user_id
@@ -272,16 +327,14 @@ async def do_cleaning(chat_id: int, page: int, per_page: int = 20):
         WHERE 
             u.chat_id = $1
             AND r.user_id IS NULL    -- Исключаем тех, у кого активный рест
-        GROUP BY u.user_id
-        HAVING 
             -- Условие 1: Пользователь уже "созрел" для чистки (прошел испытательный срок)
-            (MIN(m.date) IS NULL OR MIN(m.date) <= $4)
+            AND (d.first_message_date IS NULL OR d.first_message_date <= $4)
             AND (
                 -- Условие 2 (OR): Либо мало сообщений за последнее время
-                COUNT(CASE WHEN m.date >= $3 THEN 1 END) < $5
+                COALESCE(d.full_days_count, 0) + COALESCE(p.partial_count, 0) < $5
                 OR
                 -- Либо последнее сообщение было слишком давно (или никогда)
-                COALESCE(MAX(m.date), '1970-01-01'::timestamptz) < $6
+                COALESCE(d.last_message_date, '1970-01-01'::timestamptz) < $6
             )
         ORDER BY recent_message_count ASC
         LIMIT $7 OFFSET $8;
@@ -289,14 +342,16 @@ async def do_cleaning(chat_id: int, page: int, per_page: int = 20):
 
     rows = await db.fetchmany(
         query,
-        chat_id,            # $1
-        now_dt,             # $2
-        lookback_cutoff,    # $3
-        eligibility_cutoff, # $4
-        min_messages,       # $5
-        inactive_cutoff,    # $6
-        limit,              # $7
-        offset,             # $8
+        chat_id,                    # $1
+        now_dt,                     # $2
+        lookback_cutoff,            # $3
+        eligibility_cutoff,         # $4
+        min_messages,               # $5
+        inactive_cutoff,            # $6
+        limit,                      # $7
+        offset,                     # $8
+        lookback_full_day,          # $9
+        lookback_full_day_start,    # $10
     )
     if rows:  # проверяем, что список не пуст
         if len(rows) == limit:
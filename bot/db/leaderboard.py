@@ -1,56 +1,92 @@
 import db
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
+from config import LEADERBOARD_SNAPSHOT_TTL
+from db.messages.counters import day_bounds
+from utils.cache import TTLCache, MISSING
+
+# (chat_id, период в секундах или None) -> отсортированный топ всего чата
+_snapshots = TTLCache(maxsize=1000, ttl=LEADERBOARD_SNAPSHOT_TTL)
 
-async def user_leaderboard(chat_id: int, page: int, per_page: int = 20, since: datetime | None = None):
-    """
-    Возвращает топ пользователей в чате по количеству сообщений.
-    """
-    # Pagination
-    limit = per_page + 1 # Берём на 1 больше, чтобы смотреть есть след. страница или нет
-    offset = per_page * (page - 1)
 
+async def _fetch_leaderboard(chat_id: int, since: datetime | None) -> list[dict]:
+    """Считает полный топ пользователей чата по количеству сообщений."""
     if since is not None:
+        # Целые дни берём из счётчиков, неполный первый день — из самих сообщений
+        first_full_day, first_full_day_start = day_bounds(since)
         query = """
-            SELECT u.user_id, u.nickname, COUNT(m.message_id) AS msg_count
+            WITH counts AS (
+                SELECT user_id, SUM(count) AS msg_count
+                FROM message_counts_daily
+                WHERE chat_id = $2 AND day >= $3
+                GROUP BY user_id
+
+                UNION ALL
+
+                SELECT sender_user_id, COUNT(*)
+                FROM messages
+                WHERE chat_id = $2 AND date >= $1 AND date < $4
+                GROUP BY sender_user_id
+            )
+            SELECT u.user_id, u.nickname, COALESCE(SUM(c.msg_count), 0) AS msg_count
             FROM users u
-            LEFT JOIN messages m
-                ON u.chat_id = m.chat_id
-                AND u.user_id = m.sender_user_id
-                AND m.date >= $1
+            LEFT JOIN counts c
+                ON c.user_id = u.user_id
             WHERE u.chat_id = $2
             GROUP BY u.user_id, u.nickname
-            ORDER BY msg_count DESC
-            LIMIT $3 OFFSET $4;
+            ORDER BY msg_count DESC;
         """
-        rows = await db.fetchmany(query, since, chat_id, limit, offset)
+        rows = await db.fetchmany(query, since, chat_id, first_full_day, first_full_day_start)
     else:
         query = """
-            SELECT u.user_id, u.nickname, COUNT(m.message_id) AS msg_count
+            SELECT u.user_id, u.nickname, COALESCE(SUM(c.count), 0) AS msg_count
             FROM users u
-            LEFT JOIN messages m
-                ON u.chat_id = m.chat_id
-                AND u.user_id = m.sender_user_id
+            LEFT JOIN message_counts_daily c
+                ON u.chat_id = c.chat_id
+                AND u.user_id = c.user_id
             WHERE u.chat_id = $1
             GROUP BY u.user_id, u.nickname
-            ORDER BY msg_count DESC
-            LIMIT $2 OFFSET $3;
+            ORDER BY msg_count DESC;
         """
-        rows = await db.fetchmany(query, chat_id, limit, offset)
-        
-    if rows:  # проверяем, что список не пуст
-        if len(rows) == limit:
-            rows = rows[:-1]  # убираем последний элемент, т.к он часть след. страницы
-            next_page = page + 1
-        else:
-            next_page = None
+        rows = await db.fetchmany(query, chat_id)
+
+    return [{
+        "user_id": int(row["user_id"]),
+        "nickname": str(row["nickname"]),
+        "count": int(row["msg_count"])
+    } for row in rows]
+
+
+async def get_leaderboard_snapshot(chat_id: int, duration: timedelta | None = None) -> list[dict]:
+    """
+    Возвращает снимок топа чата за период (duration=None → за всё время).
+    Снимок считается один раз и живёт LEADERBOARD_SNAPSHOT_TTL секунд,
+    поэтому листание страниц не пересчитывает топ.
+    """
+    key = (chat_id, int(duration.total_seconds()) if duration else None)
+    snapshot = _snapshots.get(key)
+    if snapshot is MISSING:
+        since = datetime.now(timezone.utc) - duration if duration else None
+        snapshot = await _fetch_leaderboard(chat_id, since)
+        _snapshots.set(key, snapshot)
+
+    return snapshot
+
+
+async def user_leaderboard(chat_id: int, page: int, per_page: int = 20, duration: timedelta | None = None):
+    """
+    Возвращает топ пользователей в чате по количеству сообщений.
+    """
+    snapshot = await get_leaderboard_snapshot(chat_id, duration)
+
+    # Pagination
+    offset = per_page * (page - 1)
+    rows = snapshot[offset:offset + per_page]
+    next_page = page + 1 if len(snapshot) > offset + per_page else None
 
     data = {
-        "data": [{
-            "user_id": int(row["user_id"]),
-            "nickname": str(row["nickname"]),
-            "count": int(row["msg_count"])
-        }for row in rows],
+        "data": rows,
+        "total": sum(row["count"] for row in snapshot),
         "pagination": {
             "next_page": next_page,
             "prev_page": page-1 if page > 1 else None,
@@ -1,4 +1,7 @@
 import db
+from asyncpg import Connection
+from db.messages.counters import day_bounds, lock_chat_stats
+from db.messages.words import tokenize_texts
 
 from datetime import datetime
 
@@ -7,13 +10,77 @@ async def add_message(message_id:int, chat_id: int, sender_user_id: int, date: d
                       name: str, text: str, forward_user_id: int | None = None,
                       file_id: str | None = None):
     """Добавляем сообщение пользователя в чате."""
-    await db.execute(
-        """
-        INSERT INTO messages(message_id, chat_id, sender_user_id, date, forward_user_id, name, text, file_id)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-        """, message_id, chat_id, sender_user_id, date,
-        forward_user_id, name, text, file_id
-    )
+    await add_messages_batch([{
+        "message_id": message_id,
+        "chat_id": chat_id,
+        "sender_user_id": sender_user_id,
+        "date": date,
+        "forward_user_id": forward_user_id,
+        "name": name,
+        "text": text,
+        "file_id": file_id,
+    }])
+
+async def add_messages_batch(messages: list[dict], words: list[str | None] | None = None):
+    """
+    Пакетно записывает сообщения пользователей одним запросом,
+    прибавляет реально вставленные сообщения к дневным счётчикам,
+    а их слова — к частотам слов пользователей.
+    """
+    # Текст каждого сообщения токенизируется один раз — при записи
+    # (words можно передать заранее токенизированными, см. tokenize_texts)
+    if words is None:
+        words = tokenize_texts([m["text"] for m in messages])
+
+    chat_ids = [m["chat_id"] for m in messages]
+    async with db.transaction() as conn:
+        conn: Connection
+
+        # Не даём пересчёту статистики подменить строки чатов посреди записи пачки
+        await lock_chat_stats(conn, chat_ids)
+        await conn.execute(
+            """
+            WITH input AS (
+                SELECT * FROM unnest($1::bigint[], $2::bigint[], $3::bigint[], $4::timestamptz[],
+                                     $5::bigint[], $6::text[], $7::text[], $8::text[], $9::text[])
+                    AS t(message_id, chat_id, sender_user_id, date, forward_user_id, name, text, file_id, words)
+            ),
+            inserted AS (
+                INSERT INTO messages(message_id, chat_id, sender_user_id, date, forward_user_id, name, text, file_id)
+                SELECT message_id, chat_id, sender_user_id, date, forward_user_id, name, text, file_id
+                FROM input
+                ON CONFLICT (message_id, chat_id) DO NOTHING
+                RETURNING message_id, chat_id, sender_user_id, date
+            ),
+            counted AS (
+                INSERT INTO message_counts_daily (chat_id, user_id, day, count, first_at, last_at)
+                SELECT chat_id, sender_user_id, (date AT TIME ZONE 'UTC')::date, COUNT(*), MIN(date), MAX(date)
+                FROM inserted
+                GROUP BY 1, 2, 3
+                ON CONFLICT (chat_id, user_id, day) DO UPDATE SET
+                    count = message_counts_daily.count + EXCLUDED.count,
+                    first_at = LEAST(message_counts_daily.first_at, EXCLUDED.first_at),
+                    last_at = GREATEST(message_counts_daily.last_at, EXCLUDED.last_at)
+            )
+            INSERT INTO word_counts (chat_id, user_id, word, count)
+            SELECT i.chat_id, i.sender_user_id, w.word, COUNT(*)
+            FROM inserted i
+            JOIN input USING (message_id, chat_id)
+            CROSS JOIN LATERAL unnest(string_to_array(input.words, ' ')) AS w(word)
+            GROUP BY 1, 2, 3
+            ON CONFLICT (chat_id, user_id, word) DO UPDATE SET
+                count = word_counts.count + EXCLUDED.count;
+            """,
+            [m["message_id"] for m in messages],
+            chat_ids,
+            [m["sender_user_id"] for m in messages],
+            [m["date"] for m in messages],
+            [m["forward_user_id"] for m in messages],
+            [m["name"] for m in messages],
+            [m["text"] for m in messages],
+            [m["file_id"] for m in messages],
+            words,
+        )
 
 async def get_next_messages(chat_id: int, message_id: int, limit: int = 5):
     rows = await db.fetchmany(
@@ -39,12 +106,9 @@ async def get_next_messages(chat_id: int, message_id: int, limit: int = 5):
 async def plot_user_activity(chat_id: int, user_id: int):
     rows = await db.fetchmany(
         """
-            SELECT
-                date::date AS day,
-                COUNT(*) AS count
-            FROM messages
-            WHERE chat_id = $1 AND sender_user_id = $2
-            GROUP BY day
+            SELECT day, count
+            FROM message_counts_daily
+            WHERE chat_id = $1 AND user_id = $2
             ORDER BY day
             LIMIT 96;
         """, chat_id, user_id
@@ -56,18 +120,36 @@ async def plot_user_activity(chat_id: int, user_id: int):
         } for r in rows
     ]
 
-async def count_messages(chat_id: int, user_id: int, since: int | None = None):
+async def count_messages(chat_id: int, user_id: int, since: datetime | None = None):
     """Считаем количество сообщений пользователя в чате (если since=None → за всё время)."""
-    from_period = since is not None
-    args = [chat_id, user_id] + ([since] if from_period else [])
-    
+    if since is None:
+        message_quantity = await db.count(
+            """
+            SELECT SUM(count)
+            FROM message_counts_daily
+            WHERE chat_id = $1
+            AND user_id = $2
+            """, chat_id, user_id
+        )
+        return message_quantity or 0
+
+    # Целые дни берём из счётчиков, неполный первый день — из самих сообщений
+    first_full_day, first_full_day_start = day_bounds(since)
     message_quantity = await db.count(
-        f"""
-        SELECT COUNT(*)
-        FROM messages
-        WHERE chat_id = $1
-        AND sender_user_id = $2{ 'AND date >= $3' if from_period else ''}
-        """, *args
+        """
+        SELECT
+            COALESCE((
+                SELECT SUM(count)
+                FROM message_counts_daily
+                WHERE chat_id = $1 AND user_id = $2 AND day >= $4
+            ), 0)
+            + (
+                SELECT COUNT(*)
+                FROM messages
+                WHERE chat_id = $1 AND sender_user_id = $2
+                AND date >= $3 AND date < $5
+            )
+        """, chat_id, user_id, since, first_full_day, first_full_day_start
     )
     
     return message_quantity or 0
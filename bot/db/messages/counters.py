@@ -0,0 +1,82 @@
+import logging
+from datetime import datetime, date, time, timedelta, timezone
+
+import db
+from asyncpg import Connection
+
+logger = logging.getLogger(__name__)
+
+
+def day_bounds(since: datetime) -> tuple[date, datetime]:
+    """
+    Делит период "с since до сейчас" на неполный первый день и целые дни.
+
+    Сообщения начиная с первого целого дня считаются по message_counts_daily,
+    а сообщения в [since, начало первого целого дня) — по таблице messages.
+
+    Returns:
+        Кортеж (первый целый день, начало первого целого дня в UTC).
+    """
+    first_full_day = since.astimezone(timezone.utc).date() + timedelta(days=1)
+    return first_full_day, datetime.combine(first_full_day, time.min, tzinfo=timezone.utc)
+
+
+async def lock_chat_stats(conn: Connection, chat_ids: list[int], exclusive: bool = False) -> None:
+    """
+    Берёт advisory-блокировку статистики чатов (ключ — chat_id) до конца транзакции.
+
+    Запись сообщений берёт её разделяемо, поэтому пачки друг другу не мешают,
+    а пересчёт чата — эксклюзивно и только на время подмены строк этого чата.
+
+    Args:
+        conn: Соединение с открытой транзакцией.
+        chat_ids: ID чатов (повторы допустимы).
+        exclusive: Эксклюзивная блокировка вместо разделяемой.
+    """
+    lock = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    # Блокировки берутся в порядке chat_id, чтобы пачки не ждали друг друга по кругу
+    await conn.execute(
+        f"""
+        SELECT {lock}(chat_id)
+        FROM (SELECT DISTINCT unnest($1::bigint[]) AS chat_id ORDER BY 1) c;
+        """, chat_ids
+    )
+
+
+async def rebuild_chat_message_counts(chat_id: int) -> int:
+    """
+    Пересчитывает дневные счётчики чата по таблице messages.
+    Возвращает количество записанных строк счётчиков.
+    """
+    async with db.transaction() as conn:
+        conn: Connection
+
+        # Подсчёт и подмена идут под одной блокировкой чата: сообщение, записанное
+        # между ними (даже со старой датой), иначе потерялось бы. Пачка с сообщениями
+        # этого чата ждёт конца пересчёта, а новые сообщения тем временем копятся в очереди записи
+        await lock_chat_stats(conn, [chat_id], exclusive=True)
+
+        await conn.execute(
+            "DELETE FROM message_counts_daily WHERE chat_id = $1;",
+            chat_id
+        )
+        result = await conn.execute(
+            """
+            INSERT INTO message_counts_daily (chat_id, user_id, day, count, first_at, last_at)
+            SELECT chat_id, sender_user_id, (date AT TIME ZONE 'UTC')::date, COUNT(*), MIN(date), MAX(date)
+            FROM messages
+            WHERE chat_id = $1
+            GROUP BY 1, 2, 3;
+            """, chat_id
+        )
+
+    return int(result.split()[-1])
+
+
+async def backfill_message_counts() -> None:
+    """Одноразово заполняет дневные счётчики для всех чатов по уже сохранённым сообщениям."""
+    chats = await db.fetchmany("SELECT chat_id FROM chats;")
+
+    for i, chat in enumerate(chats, start=1):
+        rows = await rebuild_chat_message_counts(int(chat["chat_id"]))
+        logger.info(f"📊 [{i}/{len(chats)}] Чат {chat['chat_id']}: {rows} строк счётчиков")
@@ -1,58 +1,36 @@
-import re
 from datetime import datetime, timezone, timedelta
-from collections import Counter
 
 import db
-from asyncpg import Connection
-from config import RUSSIAN_STOPWORDS
+from db.messages.counters import day_bounds
 
 
 async def get_favorite_word(chat_id: int, user_id: int) -> dict | None:
-    # Потоково читаем последние 2000 сообщений
-    async with db.transaction() as conn:
-        conn: Connection
-
-        count = await conn.fetchval(
-            """
-            SELECT COUNT(*)
-            FROM messages
-            WHERE chat_id = $1
-            AND sender_user_id = $2
-            AND text IS NOT NULL
-            AND TRIM(text) != ''
-            """,
-            chat_id,
-            user_id
-        )
-        
-        if not count or count <= 50:
-            return None
-
-        # Создаём счётчик
-        word_counter = Counter()
-        
-        async for record in conn.cursor(
-            """
-            SELECT text
-            FROM messages
-            WHERE chat_id = $1
-            AND sender_user_id = $2
-            AND text IS NOT NULL
-            AND text != ''
-            ORDER BY date DESC
-            LIMIT 2000
-            """, chat_id, user_id
-        ):
-            text = record['text']
-            words = re.findall(r"\b\w+\b", text.lower())
-            words = [w for w in words if w not in RUSSIAN_STOPWORDS]
-            word_counter.update(words)
+    # Частоты слов ведутся при записи сообщений — здесь только берём самое частое
+    # Порог — больше 50 текстовых сообщений (медиа без подписи не считаются);
+    # считаем не дальше 51-го, чтобы не сканировать всю историю пользователя
+    row = await db.fetchone(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM (
+                SELECT 1 FROM messages
+                WHERE chat_id = $1 AND sender_user_id = $2
+                AND text IS NOT NULL
+                AND text != ''  -- условие частичного индекса idx_messages_with_text
+                AND TRIM(text) != ''
+                LIMIT 51
+            ) t) AS messages,
+            w.word, w.count
+        FROM word_counts w
+        WHERE w.chat_id = $1 AND w.user_id = $2
+        ORDER BY w.count DESC
+        LIMIT 1;
+        """, chat_id, user_id
+    )
 
-    if not word_counter:
+    if not row or row["messages"] <= 50:
         return None
 
-    most_common_word, word_count = word_counter.most_common(1)[0]
-    return {"word": most_common_word, "count": word_count}
+    return {"word": row["word"], "count": int(row["count"])}
 
 async def user_stats(chat_id: int, user_id: int):
     now_dt = datetime.now(timezone.utc)
@@ -60,24 +38,44 @@ async def user_stats(chat_id: int, user_id: int):
     one_week = now_dt - timedelta(days=7)
     one_month = now_dt - timedelta(days=30)
 
+    # Целые дни берём из счётчиков, неполный первый день периода — из самих сообщений
+    day_full, day_full_start = day_bounds(one_day)
+    week_full, week_full_start = day_bounds(one_week)
+    month_full, month_full_start = day_bounds(one_month)
+
     rows = await db.fetchone(
         """
             SELECT 
-                MIN(m.date) AS first_seen,
-                MAX(m.date) AS last_active,
-                COUNT(m.message_id) AS total,
-                SUM(CASE WHEN m.date >= $1 THEN 1 ELSE 0 END) AS day_count,
-                SUM(CASE WHEN m.date >= $2 THEN 1 ELSE 0 END) AS week_count,
-                SUM(CASE WHEN m.date >= $3 THEN 1 ELSE 0 END) AS month_count,
-                MAX(r.valid_until) AS rest   -- активный рест или NULL
-            FROM messages m
-            LEFT JOIN rests r
-                ON r.chat_id = m.chat_id
-                AND r.user_id = m.sender_user_id
-                AND r.valid_until >= NOW()  -- только текущие активные ресты
-            WHERE m.chat_id = $4 
-            AND m.sender_user_id = $5;
-        """, one_day, one_week, one_month, chat_id, user_id
+                MIN(d.first_at) AS first_seen,
+                MAX(d.last_at) AS last_active,
+                SUM(d.count) AS total,
+                COALESCE(SUM(d.count) FILTER (WHERE d.day >= $3), 0) + (
+                    SELECT COUNT(*) FROM messages
+                    WHERE chat_id = $1 AND sender_user_id = $2 AND date >= $4 AND date < $5
+                ) AS day_count,
+                COALESCE(SUM(d.count) FILTER (WHERE d.day >= $6), 0) + (
+                    SELECT COUNT(*) FROM messages
+                    WHERE chat_id = $1 AND sender_user_id = $2 AND date >= $7 AND date < $8
+                ) AS week_count,
+                COALESCE(SUM(d.count) FILTER (WHERE d.day >= $9), 0) + (
+                    SELECT COUNT(*) FROM messages
+                    WHERE chat_id = $1 AND sender_user_id = $2 AND date >= $10 AND date < $11
+                ) AS month_count,
+                (
+                    SELECT MAX(r.valid_until)   -- активный рест или NULL
+                    FROM rests r
+                    WHERE r.chat_id = $1
+                    AND r.user_id = $2
+                    AND r.valid_until >= NOW()  -- только текущие активные ресты
+                ) AS rest
+            FROM message_counts_daily d
+            WHERE d.chat_id = $1 
+            AND d.user_id = $2;
+        """,
+        chat_id, user_id,
+        day_full, one_day, day_full_start,
+        week_full, one_week, week_full_start,
+        month_full, one_month, month_full_start,
     )
 
     if not rows: return None  # пользователь не найден / нет сообщений
@@ -0,0 +1,129 @@
+import re
+import logging
+from collections import Counter, defaultdict
+
+import db
+from asyncpg import Connection
+from config import RUSSIAN_STOPWORDS, WORD_COUNTS_TOP_K
+from db.messages.counters import lock_chat_stats
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\b\w+\b")
+# Слишком длинные "слова" (ссылки, спам) не храним
+MAX_WORD_LENGTH = 64
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Разбивает текст на слова в нижнем регистре без стоп-слов."""
+    if not text:
+        return []
+    return [
+        w for w in _WORD_RE.findall(text.lower())
+        if w not in RUSSIAN_STOPWORDS and len(w) <= MAX_WORD_LENGTH
+    ]
+
+
+def tokenize_texts(texts: list[str | None]) -> list[str | None]:
+    """Токенизирует пачку текстов: слова через пробел (None — если слов нет)."""
+    words = []
+    for text in texts:
+        tokens = tokenize(text)
+        words.append(" ".join(tokens) if tokens else None)
+    return words
+
+
+def top_words(counter: Counter, top_k: int = WORD_COUNTS_TOP_K) -> list[tuple[int, str, int]]:
+    """Оставляет top_k самых частых слов каждого пользователя: [(user_id, word, count)]."""
+    by_user = defaultdict(list)
+    for (user_id, word), count in counter.items():
+        by_user[user_id].append((word, count))
+
+    # Порядок тот же, что и в prune_word_counts: по частоте, при равенстве — по слову
+    return [
+        (user_id, word, count)
+        for user_id, words in by_user.items()
+        for word, count in sorted(words, key=lambda w: (-w[1], w[0]))[:top_k]
+    ]
+
+
+async def rebuild_chat_word_counts(chat_id: int) -> int:
+    """
+    Пересчитывает частоты слов чата по таблице messages.
+    Возвращает количество записанных строк.
+    """
+    async with db.transaction() as conn:
+        conn: Connection
+
+        # Подсчёт и подмена под одной блокировкой чата, как и у дневных счётчиков
+        await lock_chat_stats(conn, [chat_id], exclusive=True)
+
+        counter = Counter()
+        async for record in conn.cursor(
+            """
+            SELECT sender_user_id, text
+            FROM messages
+            WHERE chat_id = $1
+            AND text IS NOT NULL
+            AND text != ''
+            """, chat_id
+        ):
+            user_id = int(record['sender_user_id'])
+            counter.update((user_id, word) for word in tokenize(record['text']))
+
+        await conn.execute(
+            "DELETE FROM word_counts WHERE chat_id = $1;",
+            chat_id
+        )
+
+        records = top_words(counter)
+        await conn.copy_records_to_table(
+            "word_counts",
+            records=[(chat_id, user_id, word, count) for user_id, word, count in records],
+            columns=["chat_id", "user_id", "word", "count"]
+        )
+
+    return len(records)
+
+
+async def prune_word_counts(chat_id: int, top_k: int = WORD_COUNTS_TOP_K) -> int:
+    """
+    Удаляет из частот слов чата всё, что не входит в top_k слов пользователя.
+    Возвращает количество удалённых строк.
+    """
+    result = await db.execute(
+        """
+        DELETE FROM word_counts w
+        USING (
+            SELECT user_id, word
+            FROM (
+                SELECT user_id, word,
+                       row_number() OVER (PARTITION BY user_id ORDER BY count DESC, word) AS place
+                FROM word_counts
+                WHERE chat_id = $1
+            ) ranked
+            WHERE place > $2
+        ) r
+        WHERE w.chat_id = $1 AND w.user_id = r.user_id AND w.word = r.word;
+        """, chat_id, top_k
+    )
+    return int(result.split()[-1])
+
+
+async def prune_all_word_counts(top_k: int = WORD_COUNTS_TOP_K) -> int:
+    """Обрезает частоты слов во всех чатах по очереди. Возвращает количество удалённых строк."""
+    chats = await db.fetchmany("SELECT chat_id FROM chats;")
+
+    removed = 0
+    for chat in chats:
+        removed += await prune_word_counts(int(chat["chat_id"]), top_k)
+    return removed
+
+
+async def backfill_word_counts() -> None:
+    """Одноразово заполняет частоты слов для всех чатов по уже сохранённым сообщениям."""
+    chats = await db.fetchmany("SELECT chat_id FROM chats;")
+
+    for i, chat in enumerate(chats, start=1):
+        rows = await rebuild_chat_word_counts(int(chat["chat_id"]))
+        logger.info(f"🔤 [{i}/{len(chats)}] Чат {chat['chat_id']}: {rows} строк частот слов")
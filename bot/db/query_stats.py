@@ -0,0 +1,135 @@
+import os
+import re
+import sys
+import logging
+import contextlib
+
+from config import DB_SLOW_QUERY_THRESHOLD, DB_SLOW_ACQUIRE_THRESHOLD
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+_COMMENT_RE = re.compile(r"--[^\n]*")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![$\w])\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r"\s+")
+
+# Кадры хелперов db и contextlib пропускаем при поиске имени запроса
+_SKIP_FILES = {os.path.join(os.path.dirname(__file__), "__init__.py"), contextlib.__file__}
+
+
+def normalize_sql(query: str) -> str:
+    """SQL в одну строку: без комментариев, литералы заменены на '?'."""
+    query = _COMMENT_RE.sub("", query)
+    query = _STRING_RE.sub("?", query)
+    query = _NUMBER_RE.sub("?", query)
+    return _SPACE_RE.sub(" ", query).strip()
+
+
+def arg_shapes(args: tuple) -> str:
+    """Типы (и размеры) аргументов запроса — без самих значений."""
+    shapes = []
+    for arg in args:
+        name = type(arg).__name__
+        if isinstance(arg, (str, bytes, list, tuple, set, frozenset, dict)):
+            shapes.append(f"{name}[{len(arg)}]")
+        else:
+            shapes.append(name)
+    return "(" + ", ".join(shapes) + ")"
+
+
+def caller_name() -> str:
+    """Имя запроса — функция, которая вызвала хелпер из db (модуль.функция)."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename in _SKIP_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "-"
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+def rows_affected(status: str) -> int:
+    """Кол-во строк из статуса execute ("UPDATE 3", "INSERT 0 1", ...)."""
+    last = status.rsplit(" ", 1)[-1] if status else ""
+    return int(last) if last.isdigit() else 0
+
+
+class QueryStat:
+    """Статистика одного именованного запроса."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+        self.errors = 0
+
+
+class QueryStats:
+    """
+    Статистика запросов к БД по именам и загрузка пула:
+    время ожидания соединения, сколько занято и сколько ждут.
+    """
+
+    def __init__(self):
+        self.queries: dict[str, QueryStat] = {}
+        self.acquire_wait = Histogram()
+        self.in_use = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.slow_queries = 0
+
+    def acquire_started(self) -> None:
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def acquire_finished(self, wait: float, acquired: bool) -> None:
+        self.waiting -= 1
+        self.acquire_wait.observe(wait)
+        if acquired:
+            self.in_use += 1
+        if wait >= DB_SLOW_ACQUIRE_THRESHOLD:
+            logger.warning(
+                f"🐢 Ожидание соединения с БД {wait * 1000:.0f} мс "
+                f"(занято {self.in_use}, ждут {self.waiting})"
+            )
+
+    def released(self) -> None:
+        self.in_use -= 1
+
+    def record(self, name: str, query: str, args: tuple, elapsed: float, rows: int = 0, error: Exception | None = None) -> None:
+        stat = self.queries.get(name)
+        if stat is None:
+            stat = self.queries[name] = QueryStat()
+
+        stat.latency.observe(elapsed)
+        stat.rows += rows
+        if error is not None:
+            stat.errors += 1
+
+        if elapsed >= DB_SLOW_QUERY_THRESHOLD:
+            self.slow_queries += 1
+            logger.warning(
+                f"🐢 Медленный запрос {name}: {elapsed * 1000:.0f} мс, строк {rows}, "
+                f"аргументы {arg_shapes(args)}: {normalize_sql(query)}"
+            )
+
+    def summary(self, limit: int = 10) -> str:
+        """Текстовая сводка: пул и самые медленные запросы по p95."""
+        lines = [
+            f"Пул БД: занято {self.in_use}, ждут {self.waiting} (макс. {self.max_waiting}), "
+            f"ожидание p95 {self.acquire_wait.quantile(0.95) * 1000:.0f} мс, "
+            f"медленных запросов {self.slow_queries}",
+        ]
+
+        slowest = sorted(self.queries.items(), key=lambda item: item[1].latency.quantile(0.95), reverse=True)
+        for name, stat in slowest[:limit]:
+            latency = stat.latency
+            lines.append(
+                f"{name}: p50 {latency.quantile(0.5) * 1000:.0f} | p95 {latency.quantile(0.95) * 1000:.0f} мс, "
+                f"n={latency.count}, строк {stat.rows}, ошибок {stat.errors}"
+            )
+
+        return "\n".join(lines)
+
+
+# Глобальная статистика запросов
+query_stats = QueryStats()
@@ -1,8 +1,30 @@
 import db
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
+from utils.cache import TTLCache, MISSING
+from db.users.rp_commands import refresh_rp_commands
 
+# (chat_id, user_id) -> последний записанный в БД username
+_known_users = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def invalidate_user_cache(chat_id: int, user_id: int | None = None):
+    """Забывает закэшированных пользователей чата (или одного пользователя)."""
+    if user_id is not None:
+        _known_users.pop((chat_id, user_id))
+    else:
+        _known_users.invalidate(lambda key: key[0] == chat_id)
+
+def invalidate_chats_user_cache(chat_ids: set[int]):
+    """Забывает закэшированных пользователей нескольких чатов за один проход по кэшу."""
+    _known_users.invalidate(lambda key: key[0] in chat_ids)
 
 async def upsert_user(chat_id: int, user_id: int, first_name: str, username: str | None = None):
-    """Добавит аккаунт пользователя в чате в ДБ."""
+    """Добавит аккаунт пользователя в чате в ДБ (если он новый или сменил username)."""
+    key = (chat_id, user_id)
+    cached_username = _known_users.get(key)
+    if cached_username is not MISSING and cached_username == username:
+        return
+
     await db.execute(
         """
         INSERT INTO users (chat_id, user_id, username, nickname)
@@ -12,6 +34,7 @@ async def upsert_user(chat_id: int, user_id: int, first_name: str, username: str
         """,
         chat_id, user_id, username, first_name
     )
+    _known_users.set(key, username)
 
 async def remove_user(chat_id: int, user_id: int):
     """Удалит профиль пользователя в чате из ДБ."""
@@ -21,6 +44,8 @@ async def remove_user(chat_id: int, user_id: int):
         WHERE chat_id = $1 AND user_id = $2;
         """, chat_id, user_id
     )
+    invalidate_user_cache(chat_id, user_id)
+    await refresh_rp_commands(chat_id) # РП команды пользователя удаляются каскадно
 
 async def get_all_users_in_chat(chat_id: int) -> list[int] | None:
     """Возвращает всех пользователей, зарегистрированных в чате."""
@@ -1,4 +1,5 @@
 import db
+from db.users import invalidate_user_cache
 
 async def set_nickname(chat_id: int, user_id: int, nickname: str | None):
     """Меняем кастомный ник пользователя в чате (или убираем)."""
@@ -10,6 +11,7 @@ async def set_nickname(chat_id: int, user_id: int, nickname: str | None):
         AND user_id = $3
         """, nickname, chat_id, user_id
     )
+    invalidate_user_cache(chat_id, user_id)
 
 async def get_nickname(chat_id: int, user_id: int) -> str | None:
     """Возвращает nickname пользователя в чате по uid."""
@@ -23,3 +25,16 @@ async def get_nickname(chat_id: int, user_id: int) -> str | None:
     )
 
     return nickname
+
+async def get_nicknames(chat_id: int, user_ids: list[int]) -> dict[int, str]:
+    """Возвращает nickname'ы нескольких пользователей в чате одним запросом."""
+    rows = await db.fetchmany(
+        """
+        SELECT user_id, nickname
+        FROM users
+        WHERE chat_id = $1
+        AND user_id = ANY($2::bigint[])
+        """, chat_id, list(user_ids)
+    )
+
+    return {int(row['user_id']): row['nickname'] for row in rows}
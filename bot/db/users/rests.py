@@ -81,6 +81,10 @@ async def expire_rests() -> list[dict] | None:
     # Преобразуем в список словарей
     return [{'chat_id': int(r['chat_id']), 'user_id': int(r['user_id'])} for r in rows] if rows else None
 
+async def get_next_rest_expiry() -> datetime | None:
+    """Возвращает ближайшую дату окончания реста среди всех чатов."""
+    return await db.fetchval("SELECT MIN(valid_until) FROM rests;")
+
 async def get_user_rest(chat_id: int, user_id: int) -> dict | None:
     """Возвращает информацию об ресте пользователя в чате по uid."""
     now = datetime.now(timezone.utc)
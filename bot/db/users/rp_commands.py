@@ -1,4 +1,77 @@
 import db
+from config import RP_COMMANDS_CACHE_SIZE, RP_COMMANDS_CACHE_TTL
+from utils.cache import TTLCache, MISSING
+from utils.command_trie import CommandTrie
+
+# chat_id -> {user_id: ({команда: шаблон}, префиксное дерево команд)}.
+# Дерево строится один раз при загрузке чата, а не на каждое сообщение
+_chat_commands = TTLCache(maxsize=RP_COMMANDS_CACHE_SIZE, ttl=RP_COMMANDS_CACHE_TTL)
+
+# (chat_id, user_id) -> первые буквы команд пользователя. Индекс маленький и держится
+# в памяти целиком, чтобы обычные сообщения отсеивались без обращения к БД
+_command_heads: dict[tuple[int, int], frozenset[str]] = {}
+
+
+def invalidate_rp_commands_cache(chat_id: int):
+    """Сбрасывает закэшированные РП команды чата (например, когда чат удалён)."""
+    invalidate_chats_rp_commands_cache({chat_id})
+
+def invalidate_chats_rp_commands_cache(chat_ids: set[int]):
+    """Сбрасывает закэшированные РП команды нескольких чатов за один проход по индексу."""
+    for chat_id in chat_ids:
+        _chat_commands.pop(chat_id)
+    for key in [key for key in _command_heads if key[0] in chat_ids]:
+        del _command_heads[key]
+
+async def load_rp_commands_index(chat_id: int | None = None):
+    """Загружает индекс первых букв РП команд: для всех чатов (при старте) или для одного."""
+    rows = await db.fetchmany(
+        """
+        SELECT chat_id, user_id, array_agg(DISTINCT left(command, 1)) AS heads
+        FROM rp_commands
+        WHERE $1::BIGINT IS NULL OR chat_id = $1
+        GROUP BY chat_id, user_id;
+        """, chat_id
+    )
+
+    if chat_id is None:
+        _command_heads.clear()
+    for row in rows:
+        _command_heads[(int(row['chat_id']), int(row['user_id']))] = frozenset(row['heads'])
+
+async def refresh_rp_commands(chat_id: int):
+    """Сбрасывает кэш РП команд чата и перечитывает их индекс после изменения."""
+    invalidate_rp_commands_cache(chat_id)
+    await load_rp_commands_index(chat_id)
+
+def get_rp_command_heads(chat_id: int, user_id: int) -> frozenset[str] | None:
+    """Первые буквы РП команд пользователя в чате (без обращения к БД)."""
+    return _command_heads.get((chat_id, user_id))
+
+def _format_template(emoji: str, action: str) -> str:
+    return f"{emoji} • {{trigger}} {action} {{target}}"
+
+async def _load_chat_commands(chat_id: int) -> dict[int, tuple[dict[str, str], CommandTrie]]:
+    """Загружает РП команды всех пользователей чата одним запросом (лениво, с кэшем)."""
+    commands = _chat_commands.get(chat_id)
+    if commands is not MISSING:
+        return commands
+
+    rows = await db.fetchmany(
+        """
+        SELECT user_id, command, emoji, action
+        FROM rp_commands
+        WHERE chat_id = $1;
+        """, chat_id
+    )
+
+    by_user = {}
+    for row in rows:
+        by_user.setdefault(int(row['user_id']), {})[row['command']] = _format_template(row['emoji'], row['action'])
+
+    commands = {user_id: (user_commands, CommandTrie(user_commands)) for user_id, user_commands in by_user.items()}
+    _chat_commands.set(chat_id, commands)
+    return commands
 
 async def upsert_command(chat_id: int, user_id: int, command: str, emoji: str, action: str):
     """Добавит РП команду пользователю в чате в ДБ."""
@@ -9,6 +82,7 @@ async def upsert_command(chat_id: int, user_id: int, command: str, emoji: str, a
         """,
         chat_id, user_id, command.lower(), emoji, action
     )
+    await refresh_rp_commands(chat_id)
 
 async def delete_rp_command(chat_id: int, user_id: int, command: str):
     """Удалит РП команду пользователя в чате из ДБ."""
@@ -19,6 +93,7 @@ async def delete_rp_command(chat_id: int, user_id: int, command: str):
         RETURNING chat_id, user_id;
         """, chat_id, user_id, command.lower()
     )
+    await refresh_rp_commands(chat_id)
     
     return (commands and len(commands) > 0)
 
@@ -36,15 +111,17 @@ async def count_user_commands(chat_id: int, user_id: int) -> int:
 
 async def get_user_rp_commands(chat_id: int, user_id: int) -> dict | None:
     """Возвращает список РП команд пользователя в чате."""
-    rows = await db.fetchmany(
-        """
-        SELECT command, emoji, action
-        FROM rp_commands
-        WHERE chat_id = $1 AND user_id = $2;
-        """, chat_id, user_id
-    )
+    commands = await _load_chat_commands(chat_id)
+    user_commands = commands.get(user_id)
+
+    return dict(user_commands[0]) if user_commands else None
+
+async def get_user_rp_trie(chat_id: int, user_id: int) -> CommandTrie | None:
+    """Возвращает закэшированное префиксное дерево РП команд пользователя в чате."""
+    commands = await _load_chat_commands(chat_id)
+    user_commands = commands.get(user_id)
 
-    return {row['command']: f"{row['emoji']} • {{trigger}} {row['action']} {{target}}" for row in rows} if rows else None
+    return user_commands[1] if user_commands else None
 
 async def export_rp_commands(old_chat_id: int, user_id: int, new_chat_id: int, max_limit: int) -> list[str]:
     """
@@ -81,4 +158,5 @@ async def export_rp_commands(old_chat_id: int, user_id: int, new_chat_id: int, m
     """
 
     rows = await db.fetchmany(query, old_chat_id, user_id, new_chat_id, max_limit)
+    await refresh_rp_commands(new_chat_id)
     return [row['command'] for row in rows] if rows else []
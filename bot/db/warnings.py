@@ -138,3 +138,9 @@ async def expire_warnings():
         "DELETE FROM warnings WHERE expire_date IS NOT NULL AND expire_date <= $1",
         datetime.now(timezone.utc)
     )
+
+async def get_next_warning_expiry() -> datetime | None:
+    """Возвращает ближайшую дату истечения варна среди всех чатов."""
+    return await db.fetchval(
+        "SELECT MIN(expire_date) FROM warnings WHERE expire_date IS NOT NULL;"
+    )
@@ -7,8 +7,12 @@ from aiogram import Bot, Dispatcher
 from config import TELEGRAM_TOKEN
 from routers import routers
 from middlewares import middlewares
+from middlewares.metrics import UpdateMetricsMiddleware, HandlerLabelMiddleware, TelegramApiMetricsMiddleware
 import db
-from services import scheduler
+from db.users.rp_commands import load_rp_commands_index
+from services import scheduler, web, ingestion, executor
+from services.telegram.media import fetch
+from services.telegram import outbound
 
 
 # Настройка логирования
@@ -38,7 +42,11 @@ def create_bot(token: str = TELEGRAM_TOKEN) -> Bot:
     Returns:
         Экземпляр Bot.
     """
-    return Bot(token=token)
+    bot = Bot(token=token)
+    # Первая мидлварь — внешняя: время API меряется уже после очереди отправки и без её повторов
+    bot.session.middleware(outbound.dispatcher)
+    bot.session.middleware(TelegramApiMetricsMiddleware())
+    return bot
 
 
 dp = Dispatcher()
@@ -52,7 +60,12 @@ async def _register_routers_and_middlewares(dp: Dispatcher) -> None:
     Args:
         dp: Экземпляр Dispatcher.
     """
+    dp.message.outer_middleware(UpdateMetricsMiddleware("message"))
+    dp.callback_query.outer_middleware(UpdateMetricsMiddleware("callback_query"))
+
     for router in routers:
+        router.message.middleware(HandlerLabelMiddleware())
+        router.callback_query.middleware(HandlerLabelMiddleware())
         dp.include_router(router)
     for middleware in middlewares:
         dp.message.middleware(middleware)
@@ -62,12 +75,18 @@ async def main() -> None:
     """
     Основная асинхронная функция запуска бота.
 
-    Выполняет инициализацию базы данных, запуск планировщика задач
-    и запуск polling-режима бота.
+    Запускает пул для CPU-нагрузки, выполняет инициализацию базы данных,
+    запуск рендерера изображений, HTTP сессии для скачивания файлов,
+    буфера записи сообщений, планировщика задач и запуск polling-режима бота.
     """
     await _register_routers_and_middlewares(dp)
 
+    executor.start()
     await db.init_db()
+    await load_rp_commands_index()
+    await web.init_renderer()
+    await fetch.init_session()
+    ingestion.start()
     scheduler.start(bot)
 
     try:
@@ -77,7 +96,12 @@ async def main() -> None:
             allowed_updates=dp.resolve_used_update_types(),
         )
     finally:
+        await scheduler.stop()
+        await ingestion.stop()
+        await fetch.close_session()
+        await web.close_renderer()
         await db.close_db()
+        await executor.stop()
 
 
 if __name__ == "__main__":
@@ -4,8 +4,7 @@ from aiogram.types import Message
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
 
 from db.users import upsert_user
-from db.messages import add_message
-
+from services.ingestion import ingestor
 from services.telegram.media import get_quotable_media_id
 
 class MessageOnlyMiddleware(BaseMiddleware):
@@ -19,6 +18,9 @@ class MessageOnlyMiddleware(BaseMiddleware):
                 and not event.new_chat_members):
             user = event.from_user
             chat = event.chat
+            # Пользователь пишется сразу, а не в пачке с сообщением: на users ссылаются
+            # внешние ключи варнов, наград и РП команд, которые хендлер может записать
+            # раньше, чем пачка дойдёт до БД. Пишутся только новые или сменившие username
             await upsert_user(int(chat.id), int(user.id),
                               user.first_name, user.username)
 
@@ -32,11 +34,16 @@ class MessageOnlyMiddleware(BaseMiddleware):
             date = event.date or datetime.now(timezone.utc)
             text = event.text or event.caption or ""
             
-            await add_message(int(event.message_id), int(chat.id),
-                    int(user.id), date, name,
-                    text, forward_user_id=forward_user_id,
-                    file_id=file_id
-            )
+            # Сообщение пишется в БД пачкой в фоне
+            await ingestor.submit({
+                "message_id": int(event.message_id),
+                "chat_id": int(chat.id),
+                "sender_user_id": int(user.id),
+                "date": date,
+                "name": name,
+                "text": text,
+                "forward_user_id": forward_user_id,
+                "file_id": file_id,
+            })
         
         return await handler(event, data)
-
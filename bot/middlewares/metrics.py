@@ -0,0 +1,51 @@
+import time
+
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from utils import metrics
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Внешняя мидлварь: замеряет полное время обработки апдейта.
+    Роутер и хендлер подставляет HandlerLabelMiddleware, время в БД и API —
+    обёртки вокруг соединений с БД и запросов к Telegram.
+    """
+
+    def __init__(self, event_type: str):
+        super().__init__()
+        self.event_type = event_type
+
+    async def __call__(self, handler, event, data):
+        update = metrics.UpdateTimings(self.event_type)
+        token = metrics.current_update.set(update)
+        try:
+            return await handler(event, data)
+        finally:
+            metrics.current_update.reset(token)
+            metrics.finish_update(update)
+
+
+class HandlerLabelMiddleware(BaseMiddleware):
+    """Внутренняя мидлварь роутера: запоминает, какой хендлер обработал апдейт."""
+
+    async def __call__(self, handler, event, data):
+        update = metrics.current_update.get()
+        if update is not None:
+            router = data.get("event_router")
+            handler_object = data.get("handler")
+            update.router = getattr(router, "name", "-")
+            update.handler = getattr(getattr(handler_object, "callback", None), "__name__", "-")
+        return await handler(event, data)
+
+
+class TelegramApiMetricsMiddleware(BaseRequestMiddleware):
+    """Мидлварь сессии бота: считает время запросов к Telegram API."""
+
+    async def __call__(self, make_request, bot, method):
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            metrics.add_api_time(time.perf_counter() - started)
@@ -1,4 +1,4 @@
-from .system import help, chat_members, chat_events
+from .system import help, chat_members, chat_events, developer
 from .moderation import call, chat_settings, cleaning, warnings, rests
 from .social import awards, leaderboard, marriages, families, nicknames, personal_rp_commands, quotes, user_info
 
@@ -21,6 +21,7 @@ routers = [
     rests.router,
 
     # system
+    developer.router,
     help.router,
     chat_members.router,
     chat_events.router,
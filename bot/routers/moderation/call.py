@@ -1,12 +1,11 @@
 import re
-import asyncio
 
 from aiogram import Router, F
 from aiogram.types import Message
 from middlewares.maintenance import MaintenanceMiddleware
 
-from services.telegram.user_mention import mention_user
 from services.telegram.user_permissions import is_admin
+from services.messaging.call import start_call, is_call_running
 from db.users import get_all_users_in_chat
 
 router = Router(name="call")
@@ -49,16 +48,10 @@ async def сall_members(msg: Message):
         await msg.reply("❌ Нет участников для созыва.")
         return
     
-    reply_msg_id = msg.reply_to_message.message_id if msg.reply_to_message else None
-    
-    for i in range(0, len(users), 5):
-        chunk = users[i:i+5]
-        text = f"⚡ {arg if arg.strip() else 'Внимание!'}\n\n"
-
-        mentions = await asyncio.gather(*(mention_user(bot=bot, chat_id=chat_id, user_id=u) for u in chunk))
-        text += "\n".join(mentions)
+    if is_call_running(chat_id):
+        await msg.reply("❌ Созыв в этом чате уже идёт.")
+        return
 
-        if reply_msg_id:
-            await bot.send_message(chat_id=chat_id, text=text, reply_to_message_id=reply_msg_id, parse_mode="HTML")
-        else:
-            await msg.reply(text, parse_mode="HTML")
+    # Созыв отвечает на сообщение, на которое ответили командой, иначе — на саму команду
+    reply_msg_id = msg.reply_to_message.message_id if msg.reply_to_message else msg.message_id
+    start_call(bot, chat_id, reply_msg_id, arg, [int(uid) for uid in users])
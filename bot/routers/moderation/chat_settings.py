@@ -9,6 +9,7 @@ from services.telegram.user_permissions import is_admin
 from db.chats.settings import set_max_warns, set_cleaning_min_messages, set_cleaning_max_inactive, set_cleaning_eligibility_duration, set_cleaning_lookback, enable_auto_cleaning, disable_auto_cleaning, get_all_settings
 from db.chats.cleaning import check_cleanability
 from services.time_utils import DurationParser, TimedeltaFormatter
+from services import scheduler
 
 router = Router(name="chat_settings")
 router.message.middleware(MaintenanceMiddleware())
@@ -219,6 +220,7 @@ async def auto_cleaning_handler(msg: Message):
         return next_cleaning - now
     
     await enable_auto_cleaning(chat_id, day, pg_time)
+    scheduler.notify(scheduler.CLEANING, scheduler.next_cleaning_time(day, pg_time, None, datetime.now(timezone.utc)))
     await msg.reply(f"📛 Авточистка успешно включена\n⏳ Cледующая чистка через {TimedeltaFormatter.format(time_until_next_cleaning(day, pg_time), suffix="none")}")
 
 
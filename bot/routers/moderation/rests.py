@@ -13,6 +13,7 @@ from services.telegram.keyboards.pagination import Pagination
 from services.telegram.keyboards.rests import RestRequest, get_rest_request_keyboard
 
 from services.time_utils import DurationParser, TimedeltaFormatter, deserialize_timedelta
+from services import scheduler
 from db.messages.statistics import user_stats
 from db.users.rests import add_rest, remove_rest
 
@@ -160,6 +161,7 @@ async def give_rest(msg: Message):
     beauty_until = TimedeltaFormatter.format(duration, suffix="none")
 
     await add_rest(chat_id, target_user_id, administrator_user_id=trigger_user_id, valid_until=until)
+    scheduler.notify(scheduler.RESTS, until)
     user_mention = await mention_user(bot=bot, chat_id=chat_id, user_entity=target_user)
     administrator_mention = await mention_user(bot=bot, chat_id=chat_id, user_entity=msg.from_user)
 
@@ -288,6 +290,7 @@ async def rest_request_accept_callback_handler(callback: CallbackQuery, callback
         beauty_until = TimedeltaFormatter.format(delta, suffix="none")
 
         await add_rest(chat_id, int(target_user.id), administrator_user_id=int(trigger_user.id), valid_until=until)
+        scheduler.notify(scheduler.RESTS, until)
 
         ans = (
             f"⏰ Пользователю {target_user_mention} успешно выдан рест.\n"
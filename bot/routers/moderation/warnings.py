@@ -14,6 +14,7 @@ from services.telegram.keyboards.pagination import Pagination
 
 from config import WARNINGS_PICTURE_ID
 from services.time_utils import DurationParser, TimedeltaFormatter
+from services import scheduler
 
 from db.chats.settings import get_max_warns
 from db.warnings import add_warning, remove_warning, amnesty
@@ -120,6 +121,7 @@ async def add_warning_handler(msg: Message):
         return
 
     warn_id = await add_warning(chat_id, int(target_user.id), admin_id, reason, expire_date)
+    scheduler.notify(scheduler.WARNINGS, expire_date)
     mention = await mention_user(bot=bot, chat_id=chat_id, user_entity=target_user)
     formatted_period = f"на {TimedeltaFormatter.format(period, suffix='none')}" if period else "навсегда"
 
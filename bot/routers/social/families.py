@@ -4,6 +4,7 @@ from aiogram.types import Message, CallbackQuery, InputMediaPhoto
 
 from middlewares.maintenance import MaintenanceMiddleware
 from services.messaging.families import generate_family_tree_msg, can_become_parent
+from services.web.render_cache import remember_file_id
 from services.telegram.user_mention import mention_user, get_chat_member
 from services.telegram.user_parser import parse_user_mention
 
@@ -156,13 +157,14 @@ async def family_tree_handler(msg: Message):
             await msg.reply("❌ Этот пользователь пока не состоит в семье.", parse_mode="HTML")
         return
 
-    await msg.reply_photo(
+    sent = await msg.reply_photo(
         photo=img,
         caption=text,
         reply_to_message_id=msg.message_id,
         reply_markup=keyboard,
         parse_mode="HTML"
     )
+    remember_file_id(img, sent)
 
 @router.callback_query(AdoptionRequest.filter(F.response == "accept"))
 async def adoption_accept_callback_handler(callback: CallbackQuery, callback_data: AdoptionRequest):
@@ -267,7 +269,7 @@ async def user_family_info_callback_handler(callback: CallbackQuery, callback_da
             await callback.answer(text=f"❕Этот пользователь пока не состоит в семье.", show_alert=True)
         return
 
-    await msg.edit_media(
+    edited = await msg.edit_media(
         media=InputMediaPhoto(
             media=img,
             caption=text,
@@ -275,4 +277,5 @@ async def user_family_info_callback_handler(callback: CallbackQuery, callback_da
         ), 
         reply_markup=keyboard
     )
+    remember_file_id(img, edited)
     await callback.answer("") # пустой ответ, чтобы убрать "часики"
@@ -1,17 +1,25 @@
-from aiogram import Router, F
+import time
+import asyncio
+import logging
+
+from aiogram import Bot, Router, F
 from aiogram.types import Message, CallbackQuery, BufferedInputFile
 
 from middlewares.maintenance import MaintenanceMiddleware
 from services.telegram.user_permissions import is_admin
-from services.telegram.media.fetch import fetch_bytes
+from services.telegram.media.fetch import FileTooLarge
 from services.telegram.media.convert import image_bytes_to_webp
 from services.telegram.media.info import get_mime_type
-from services.telegram.media import get_message_media, get_user_avatar, get_quotable_media_id
+from services.telegram.media import get_message_media, get_user_avatar, get_quotable_media_id, fetch_media_bytes
 from services.telegram.keyboards.quotes import QuoteDelition, get_quote_delition_keyboard
 from services.web.quotes import make_quote
+from services.web.render_cache import as_input_file, remember_file_id
 
 from db.quotes import add_quote, remove_quote
 from db.messages import get_next_messages
+from config import QUOTE_FETCH_CONCURRENCY
+
+logger = logging.getLogger(__name__)
 
 router = Router(name="quotes")
 router.message.middleware(MaintenanceMiddleware())
@@ -39,7 +47,7 @@ async def add_quote_handler(msg: Message):
         await msg.reply("❌ В ответе должно быть медиа (стикер, фото, видео, гифка) не превышающее 10мб.")
         return
     
-    media_bytes = await fetch_bytes(bot, media["file_id"])
+    media_bytes = await fetch_media_bytes(bot, media["file_id"], media["file_unique_id"])
     webp_bytes = await image_bytes_to_webp(media_bytes) 
 
     quote_file = BufferedInputFile(webp_bytes, filename="quote.webp")
@@ -57,6 +65,23 @@ async def add_quote_handler(msg: Message):
         await add_quote(int(msg.chat.id), str(sticker_id))
 
 
+async def _limited(semaphore: asyncio.Semaphore, coro):
+    async with semaphore:
+        return await coro
+
+
+async def _fetch_media(bot: Bot, file_id: str) -> dict | None:
+    """Скачивает медиа сообщения и определяет его тип."""
+    try:
+        media_bytes = await fetch_media_bytes(bot, file_id)
+    except FileTooLarge:
+        return None # слишком большое медиа просто не показываем
+
+    mime_type = await get_mime_type(media_bytes)
+    if not mime_type: return None
+    return {"source": media_bytes, "type": mime_type}
+
+
 @router.message(
     F.text.lower().startswith("/q")
 )
@@ -75,76 +100,96 @@ async def make_quote_handler(msg: Message):
         await msg.reply("❌ Слишком много сообщений для цитаты (макс 5).")
         return
 
-    avatars = {}
-    avatar = None
-    
+    timings = {"db": 0.0, "downloads": 0.0, "render": 0.0, "upload": 0.0}
+    semaphore = asyncio.Semaphore(QUOTE_FETCH_CONCURRENCY)
+
+    # Аватарка каждого пользователя скачивается один раз, даже если он встречается несколько раз
+    avatar_tasks: dict[int, asyncio.Task] = {}
+    def avatar_of(uid: int) -> asyncio.Task:
+        if uid not in avatar_tasks:
+            avatar_tasks[uid] = asyncio.ensure_future(_limited(semaphore, get_user_avatar(bot, uid)))
+        return avatar_tasks[uid]
+
     text = reply.text or reply.caption or ""
-    media = await get_message_media(bot, reply)
+    user = reply.from_user if not reply.forward_from else reply.forward_from
+    name = reply.forward_sender_name or user.full_name
+    is_forward = bool(reply.forward_from or reply.forward_sender_name)
+
+    started = time.perf_counter()
+    media_task = asyncio.ensure_future(get_message_media(bot, reply))
+    avatar_task = avatar_of(int(user.id)) if not is_forward else None
+    media = await media_task
     if not text.strip() and not media:
+        if avatar_task: avatar_task.cancel()
         await msg.reply("❌ Это сообщение невозможно цитировать.")
         return
 
-    user = reply.from_user if not reply.forward_from else reply.forward_from
-    name = reply.forward_sender_name or user.full_name
-
-    is_forward = bool(reply.forward_from or reply.forward_sender_name)
-    if not is_forward:
-        avatar = await get_user_avatar(bot, int(user.id))
-        avatars[int(user.id)] = avatar
+    avatar = await avatar_task if avatar_task else None
+    timings["downloads"] += time.perf_counter() - started
 
     quote_materials = [{"name": name, "text": text, "avatar": avatar, "media": media}]
 
     if not one_quote:
         msg_quantity = int(parts[1]) + 1 # включаем родительское сообщение, которое в счёт не идёт
         first_msg_id = msg.reply_to_message.message_id
+
+        started = time.perf_counter()
         msgs = await get_next_messages(int(msg.chat.id), int(first_msg_id), msg_quantity - 1)
-        for m in msgs:
-            name = m["name"]
-            text = m["text"]
+        timings["db"] += time.perf_counter() - started
+
+        async def collect(m: dict) -> dict | None:
+            text = m["text"] or ""
             uid = int(m["user_id"])
             media_id = m["file_id"]
-            no_avatar_forward = False
+            if not text.strip() and not media_id: return None
 
+            no_avatar_forward = False
             forward_user_id = m["forward_user_id"]
-            if forward_user_id and forward_user_id.isdigit():
-                if int(forward_user_id) != 1: uid = int(m["forward_user_id"])
+            if forward_user_id:
+                if int(forward_user_id) != 1: uid = int(forward_user_id)
                 else: no_avatar_forward = True
 
-            # Получаем медиа, если есть
-            media = None
-            if media_id:
-                media_bytes = await fetch_bytes(bot, media_id)
-                mime_type = await get_mime_type(media_bytes)
-                if mime_type:
-                    media = {"source": media_bytes, "type": mime_type}
-
-            if not text.strip() and not media: continue
-            
-            if no_avatar_forward:
-                avatar = None
-            elif uid in avatars:
-                avatar = avatars[uid]
-            else:
-                avatar = await get_user_avatar(bot, uid)
-                avatars[uid] = avatar
-
-            quote_materials.append({"name": name, "text": text, "avatar": avatar, "media": media})
-            if len(quote_materials) >= msg_quantity: break
+            # Медиа и аватарка скачиваются параллельно
+            media_coro = _limited(semaphore, _fetch_media(bot, media_id)) if media_id else asyncio.sleep(0)
+            avatar_coro = avatar_of(uid) if not no_avatar_forward else asyncio.sleep(0)
+            media, avatar = await asyncio.gather(media_coro, avatar_coro)
 
-    quote = await make_quote(quote_materials)
-    quote_file = BufferedInputFile(quote, filename="quote.webp")
+            if not text.strip() and not media: return None
+            return {"name": m["name"], "text": text, "avatar": avatar, "media": media}
+
+        # Порядок сообщений сохраняется: gather возвращает результаты в порядке задач
+        started = time.perf_counter()
+        collected = await asyncio.gather(*(collect(m) for m in msgs))
+        timings["downloads"] += time.perf_counter() - started
 
+        quote_materials += [m for m in collected if m]
+        quote_materials = quote_materials[:msg_quantity]
 
+    started = time.perf_counter()
+    quote = await make_quote(quote_materials)
+    quote_file = as_input_file(quote, filename="quote.webp")
+    timings["render"] += time.perf_counter() - started
+
+    started = time.perf_counter()
     keyboard = await get_quote_delition_keyboard()
     sent_msg = await bot.send_sticker(
         chat_id=msg.chat.id, sticker=quote_file,
         reply_to_message_id=msg.message_id,
         reply_markup=keyboard
         )
+    remember_file_id(quote_file, sent_msg)
+    timings["upload"] += time.perf_counter() - started
     
     if sent_msg.sticker:
         sticker_id = sent_msg.sticker.file_id
+        started = time.perf_counter()
         await add_quote(int(msg.chat.id), str(sticker_id))
+        timings["db"] += time.perf_counter() - started
+
+    logger.info(
+        f"💬 Цитата в чате {msg.chat.id} ({len(quote_materials)} сообщ.): "
+        + ", ".join(f"{stage} {seconds * 1000:.0f} мс" for stage, seconds in timings.items())
+    )
 
 
 @router.callback_query(QuoteDelition.filter())
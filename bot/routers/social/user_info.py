@@ -6,6 +6,7 @@ from middlewares.maintenance import MaintenanceMiddleware
 from services.telegram.chat_member import get_chat_member
 from services.telegram.user_parser import parse_user_mention
 from services.messaging.user_info import generate_user_info_msg
+from services.web.render_cache import remember_file_id
 from services.telegram.keyboards.pagination import Pagination
 
 router = Router(name="user_info")
@@ -46,12 +47,13 @@ async def user_info_handler(msg: Message):
         await msg.reply("❌ Нет данных по этому пользователю.")
         return
     
-    await bot.send_photo(chat_id=chat_id,
+    sent = await bot.send_photo(chat_id=chat_id,
         photo=img,
         caption=text, reply_to_message_id=msg.message_id,
         reply_markup=keyboard,
         parse_mode="HTML"
     )
+    remember_file_id(img, sent)
 
 
 @router.callback_query(
@@ -68,7 +70,7 @@ async def user_info_back_pagination_handler(callback: CallbackQuery, callback_da
 
     text, keyboard, img = await generate_user_info_msg(callback.bot, callback.message.chat.id, member.user)
     if text:
-        await msg.edit_media(
+        edited = await msg.edit_media(
             media=InputMediaPhoto(
                 media=img,
                 caption=text,
@@ -76,6 +78,7 @@ async def user_info_back_pagination_handler(callback: CallbackQuery, callback_da
             ), 
             reply_markup=keyboard
         )
+        remember_file_id(img, edited)
         await callback.answer("") # пустой ответ, чтобы убрать "часики"
     
     else:
@@ -2,51 +2,77 @@ import random
 from aiogram import Router, F
 from aiogram.types import Message
 
-from db.users.rp_commands import get_user_rp_commands
+from db.users.rp_commands import get_user_rp_trie, get_rp_command_heads
 from db.quotes import get_random_quote
 
 from middlewares.maintenance import MaintenanceMiddleware
 from services.telegram.keyboards.quotes import get_quote_delition_keyboard
-from services.process_roleplay import parse_rp_command
-from services.telegram.user_parser import parse_user_mention_and_clean_text
+from services.process_roleplay import parse_rp_command, match_rp_command, may_be_rp_command, record_rp_stage
+from services.telegram.user_parser import parse_user_mention_and_clean_text, iter_texts_without_mention
 
 router = Router(name="groups")
 router.message.middleware(MaintenanceMiddleware(notify=False))
 router.callback_query.middleware(MaintenanceMiddleware(notify=False))
 
 
+# Префиксы, с которыми можно писать РП команды
+RP_PREFIXES = "".join(["!", "/", "-", "—", "."])
+
+
 @router.message(F.chat.type.in_(["group", "supergroup"]))
 async def on_message(msg: Message):
-    # Пробуем обработать как RP команду
+    # Пробуем обработать как РП команду
     bot = msg.bot
     user = msg.from_user
     chat = msg.chat
-    text = msg.text or msg.caption
+    text = msg.text # подписи к медиа РП командами не считаются
 
-    if text and user and bot:
+    if not (text and user and bot):
+        record_rp_stage("no_text")
+    else:
         # Удаляем префиксы
-        prefixes = ["!", "/", "-", "—", "."]
-        text = text.lstrip("".join(prefixes))
-
-        # Упоминание пользователя в тексте
-        target_user_entity, text = await parse_user_mention_and_clean_text(bot, msg)
-        if not text: return # Если текст пустой после удаления упоминания, то сразу пропускаем
-
-        if not target_user_entity:
-            if msg.reply_to_message and msg.reply_to_message.from_user:
-                # Реплай на пользователя
-                target_user_entity = msg.reply_to_message.from_user
-            # Если target_user_entity стал None, то действие направлено на самих нас
-
-        user_rp_commands = await get_user_rp_commands(int(chat.id), int(user.id))
-        command = await parse_rp_command(
-            bot, int(chat.id), text,
-            user, target_user_entity, user_rp_commands
-        )
-
-        if command:
-            await (msg.reply_to_message or msg).reply(command, parse_mode="HTML")
-            return # если это ролевое сообщение, не продолжаем дальше
+        text = text.lstrip(RP_PREFIXES)
+
+        # Этап 1: без запросов к Telegram и БД проверяем, может ли это вообще быть РП командой
+        # (как есть или после удаления одного из упоминаний)
+        user_heads = get_rp_command_heads(int(chat.id), int(user.id))
+        candidates = [text, *(t.lstrip(RP_PREFIXES) for t in iter_texts_without_mention(msg))]
+
+        is_candidate = any(may_be_rp_command(t, user_heads) for t in candidates)
+
+        # Команды пользователя (дерево из кэша) загружаем, только если первая буква совпала
+        user_rp_trie = None
+        if is_candidate and user_heads:
+            user_rp_trie = await get_user_rp_trie(int(chat.id), int(user.id))
+            is_candidate = any(match_rp_command(t, user_rp_trie) for t in candidates)
+
+        if not is_candidate:
+            record_rp_stage("not_command")
+        else:
+
+            # Этап 2: упоминание пользователя в тексте
+            target_user_entity, clean_text = await parse_user_mention_and_clean_text(bot, msg)
+            if target_user_entity:
+                text = (clean_text or "").lstrip(RP_PREFIXES)
+
+            # Этап 3: реплай на пользователя
+            if not target_user_entity:
+                if msg.reply_to_message and msg.reply_to_message.from_user:
+                    target_user_entity = msg.reply_to_message.from_user
+                # Если target_user_entity стал None, то действие направлено на самих нас
+
+            # Этап 4: сборка ответа с упоминаниями
+            command = await parse_rp_command(
+                bot, int(chat.id), text,
+                user, target_user_entity, user_rp_trie
+            )
+
+            if command:
+                record_rp_stage("handled")
+                await (msg.reply_to_message or msg).reply(command, parse_mode="HTML")
+                return # если это ролевое сообщение, не продолжаем дальше
+
+            record_rp_stage("no_match_after_mention")
     
     # выдача рандомной цитаты
     if random.random() < 0.005:  # ~0.5% шанс
@@ -3,6 +3,7 @@ from aiogram.types import ChatMemberUpdated, Message
 
 from utils.telegram.message_templates import send_welcome_message
 from services.messaging.marriages import delete_marriage_and_notify
+from services.telegram.chat_member import cache_chat_member, invalidate_chat_member
 from db.users import upsert_user, remove_user
 from db.chats import add_chat, migrate_chat, forget_chat
 
@@ -27,20 +28,28 @@ async def on_my_chat_member(update: ChatMemberUpdated):
     elif update.new_chat_member.status in ("left", "kicked"):
         # Удаляем чат из ДБ
         await forget_chat(cid)
+        invalidate_chat_member(cid)
+
+@router.chat_member()
+async def on_chat_member(update: ChatMemberUpdated):
+    """Обновляем кэш участников при изменении статуса пользователя в чате."""
+    cache_chat_member(int(update.chat.id), int(update.new_chat_member.user.id), update.new_chat_member)
 
 @router.message(F.new_chat_members)
 async def on_user_joined(msg: Message):
     cid = (int(msg.chat.id))
     for user in msg.new_chat_members:
+        invalidate_chat_member(cid, int(user.id))
         if not user.is_bot:
             await upsert_user(cid, user.id, user.first_name, user.username)
 
 @router.message(F.left_chat_member)
 async def on_user_left(msg: Message):
     user = msg.left_chat_member
-    if user.is_bot: return
     cid = (int(msg.chat.id))
     uid = int(user.id)
+    invalidate_chat_member(cid, uid)
+    if user.is_bot: return
 
     text = await delete_marriage_and_notify(msg.bot, chat_id=int(msg.chat.id), user_id=int(user.id), left_chat=True)
     if text:
@@ -0,0 +1,34 @@
+from aiogram import Router, F, html
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from config import DEVELOPERS_ID
+from utils import metrics
+from db.query_stats import query_stats
+from services.executor import executor, loop_lag
+from services.process_roleplay import get_rp_pipeline_stats
+from services.telegram.chat_member import get_chat_member_cache_stats
+from services.telegram import outbound
+from services.web.render_cache import render_cache
+
+router = Router(name="developer")
+router.message.filter(F.from_user.id.in_(DEVELOPERS_ID))
+
+
+@router.message(Command("metrics"))
+async def metrics_handler(msg: Message):
+    """Команда: /metrics (только для разработчиков)"""
+    report = "\n".join([
+        metrics.summary(),
+        "",
+        query_stats.summary(),
+        "",
+        f"Лаг сейчас: {loop_lag.stats()}",
+        f"CPU пул: {executor.stats()}",
+        f"Кэш участников: {get_chat_member_cache_stats()}",
+        f"Кэш рендеров: {render_cache.stats()}",
+        f"RP конвейер: {get_rp_pipeline_stats()}",
+        f"Отправки: {outbound.dispatcher.stats()}",
+    ])
+
+    await msg.reply(f"<pre>{html.quote(report)}</pre>", parse_mode="HTML")
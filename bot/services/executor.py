@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from config import CPU_EXECUTOR_WORKERS, LOOP_LAG_INTERVAL, LOOP_LAG_LOG_INTERVAL
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CpuExecutor:
+    """
+    Общий пул потоков для CPU-нагрузки (Pillow, base64, токенизация).
+
+    Pillow и hashlib отпускают GIL, поэтому пул потоков не блокирует event loop
+    и не требует сериализации данных, как пул процессов.
+    Считает глубину очереди, время ожидания и выполнения задач.
+    """
+
+    def __init__(self, workers: int = CPU_EXECUTOR_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.wait_time = 0.0
+        self.run_time = 0.0
+        self._lock = threading.Lock() # счётчики меняются и из потоков пула
+
+    @property
+    def queue_depth(self) -> int:
+        """Задачи, которые ждут свободного потока."""
+        return self.submitted - self.started
+
+    def _pool_or_create(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cpu")
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _call(self, submitted_at: float, func: Callable, *args, **kwargs) -> tuple[Any, float]:
+        started = time.perf_counter()
+        with self._lock:
+            self.started += 1
+            self.running += 1
+        try:
+            return func(*args, **kwargs), started - submitted_at
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.run_time += time.perf_counter() - started
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Выполняет func(*args, **kwargs) в пуле и ждёт результат."""
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            result, waited = await loop.run_in_executor(
+                self._pool_or_create(),
+                partial(self._call, time.perf_counter(), func, *args, **kwargs)
+            )
+        finally:
+            self.completed += 1
+        self.wait_time += waited
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "running": self.running,
+            "completed": self.completed,
+            "avg_wait_ms": self.wait_time / self.completed * 1000 if self.completed else 0.0,
+            "avg_run_ms": self.run_time / self.completed * 1000 if self.completed else 0.0,
+        }
+
+
+class LoopLagMonitor:
+    """
+    Измеряет задержку event loop: насколько позже запланированного
+    просыпается sleep(interval). Большой лаг — признак блокирующего кода.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, log_interval: float = LOOP_LAG_LOG_INTERVAL):
+        self.interval = interval
+        self.log_interval = log_interval
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+
+        self.last_lag = 0.0
+
+    def _reset(self) -> None:
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_log = loop.time() + self.log_interval
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+
+            self.last_lag = lag
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            metrics.loop_lag.observe(lag)
+
+            if loop.time() >= next_log:
+                next_log = loop.time() + self.log_interval
+                logger.info(
+                    f"⏱ Лаг event loop: ср. {self.stats()['avg_lag_ms']:.1f} мс, "
+                    f"макс. {self.max_lag * 1000:.1f} мс; CPU пул: {executor.stats()}"
+                )
+                logger.info(f"📈 Задержки обработки:\n{metrics.summary(limit=5)}")
+                self._reset()
+
+    def stats(self) -> dict:
+        """Лаг за текущий интервал логирования."""
+        return {
+            "last_lag_ms": self.last_lag * 1000,
+            "avg_lag_ms": self.total_lag / self.samples * 1000 if self.samples else 0.0,
+            "max_lag_ms": self.max_lag * 1000,
+        }
+
+
+# Глобальный пул и монитор лага
+executor = CpuExecutor()
+loop_lag = LoopLagMonitor()
+
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    """Выполняет CPU-нагруженную функцию в общем пуле, не блокируя event loop."""
+    return await executor.run(func, *args, **kwargs)
+
+
+def start() -> None:
+    loop_lag.start()
+
+
+async def stop() -> None:
+    await loop_lag.stop()
+    executor.shutdown()
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Optional
+
+from db.messages import add_messages_batch
+from db.messages.words import tokenize_texts
+from services.executor import run_cpu
+from config import INGESTION_BATCH_SIZE, INGESTION_FLUSH_INTERVAL, INGESTION_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class MessageIngestor:
+    """
+    Буферизованная запись входящих сообщений в БД.
+
+    Сообщения складываются в очередь и пишутся пачками: каждые batch_size
+    записей или каждые flush_interval секунд.
+    Очередь ограничена — при её переполнении submit() ждёт, пока воркер
+    не освободит место (backpressure).
+    Пользователи сюда не попадают: на них ссылаются внешние ключи других таблиц,
+    поэтому они записываются сразу (см. MessageOnlyMiddleware).
+    """
+
+    def __init__(self, batch_size: int = INGESTION_BATCH_SIZE,
+                 flush_interval: float = INGESTION_FLUSH_INTERVAL,
+                 queue_size: int = INGESTION_QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: asyncio.Queue[Optional[dict]] = asyncio.Queue(maxsize=queue_size)
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self) -> None:
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Дожидается записи всего, что уже лежит в очереди, и останавливает воркер."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+
+    async def submit(self, record: dict) -> None:
+        """Ставит сообщение в очередь на запись."""
+        if not self.running:
+            # Воркер не запущен (например, при остановке) — пишем сразу
+            await self._flush([record])
+            return
+        await self._queue.put(record)
+
+    async def _collect(self) -> tuple[list[dict], bool]:
+        """Собирает пачку записей. Возвращает (пачка, пора_остановиться)."""
+        batch = []
+        first = await self._queue.get()
+        if first is None:
+            return batch, True
+        batch.append(first)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                record = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if record is None:
+                return batch, True
+            batch.append(record)
+
+        return batch, False
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+        # Дописываем всё, что успели положить после стоп-сигнала
+        rest = []
+        while not self._queue.empty():
+            record = self._queue.get_nowait()
+            if record is not None:
+                rest.append(record)
+        if rest:
+            await self._flush(rest)
+
+    async def _flush(self, batch: list[dict]) -> None:
+        # Токенизация пачки — CPU-нагрузка, выполняем её вне event loop
+        words = await run_cpu(tokenize_texts, [record["text"] for record in batch])
+        try:
+            await add_messages_batch(batch, words)
+        except Exception as e:
+            # Одна битая запись (например, чат ещё не в БД) не должна терять всю пачку
+            logger.warning(f"Ошибка пакетной записи {len(batch)} сообщ., пишем по одному: {e}")
+            for record in batch:
+                try:
+                    await add_messages_batch([record])
+                except Exception as e:
+                    logger.error(
+                        f"Не удалось записать сообщение {record['message_id']} "
+                        f"в чате {record['chat_id']}: {e}"
+                    )
+
+
+# Глобальный буфер сообщений
+ingestor = MessageIngestor()
+
+
+def start() -> None:
+    ingestor.start()
+
+
+async def stop() -> None:
+    await ingestor.stop()
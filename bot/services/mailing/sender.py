@@ -1,47 +1,100 @@
+import time
 import asyncio
+import logging
 from aiogram import Bot
 from aiogram.exceptions import TelegramNotFound, TelegramForbiddenError, TelegramNetworkError
 
 from db import init_db, close_db
-from db.chats import get_all_chat_ids, forget_chat
-from config import TELEGRAM_TOKEN, MAINTENANCE_PICTURE_ID, UPDATE_PICTURE_ID
+from db.chats import forget_chats
+from db.broadcasts import (
+    get_or_create_broadcast, count_pending_chats, fetch_pending_chats,
+    record_delivery, save_checkpoint, get_dead_chats, finish_broadcast
+)
+from config import TELEGRAM_TOKEN, MAINTENANCE_PICTURE_ID, UPDATE_PICTURE_ID, MAILING_BATCH_SIZE, MAILING_CONCURRENCY
+from services.telegram import outbound
+
+logger = logging.getLogger(__name__)
 
 bot = Bot(token=TELEGRAM_TOKEN)
+bot.session.middleware(outbound.dispatcher) # лимиты отправки и RetryAfter
 
+NETWORK_RETRIES = 3
 
-# Отправка фото по file_id
-async def _send(chat_id: int, file_id: str, caption: str | None = None):
-    try:
-        await bot.send_photo(chat_id=chat_id, photo=file_id, caption=caption, parse_mode="HTML")
 
-    except TelegramNotFound or TelegramForbiddenError as e:
-        # Бот заблокирован, удален из группы, или
-        # сама группа удалена
-        await forget_chat(int(chat_id))
-        return
+# Отправка фото по file_id, возвращает статус доставки
+async def _send(chat_id: int, file_id: str, caption: str | None = None) -> str:
+    for attempt in range(NETWORK_RETRIES + 1):
+        try:
+            await bot.send_photo(chat_id=chat_id, photo=file_id, caption=caption, parse_mode="HTML")
+            return "sent"
+
+        except (TelegramNotFound, TelegramForbiddenError):
+            # Бот заблокирован, удален из группы, или
+            # сама группа удалена — чат удалим в конце рассылки
+            return "dead"
+
+        except TelegramNetworkError as e:
+            # Проблемы с сетью/таймаут: повторяем с паузой, но не бесконечно
+            if attempt == NETWORK_RETRIES:
+                logger.warning(f"⚠️ Network error for chat {chat_id}: {e}")
+                return "failed"
+            await asyncio.sleep(0.6 * (attempt + 1))
+
+        except Exception as e:
+            # Неверный file_id, неподдерживаемый формат,
+            # слишком большой размер файла и прочие непредвиденные ошибки
+            logger.warning(f"⚠️ Unexpected error for chat {chat_id}: {e}")
+            return "failed"
 
-    except TelegramNetworkError as e:
-        # Проблемы с сетью/таймаут
-        await asyncio.sleep(0.6)
-        await _send(chat_id, file_id, caption)
 
-    except Exception as e:
-        # Неверный file_id, неподдерживаемый формат,
-        # слишком большой размер файла и прочие непредвиденные ошибки
-        print(f"⚠️ Unexpected error: {e}")
+# Рассылка пачками по chat_id с чекпоинтом после каждой пачки
+async def _preparer(file_id: str, caption: str | None = None, limit: int = MAILING_CONCURRENCY):
+    broadcast = await get_or_create_broadcast(file_id, caption)
+    broadcast_id, cursor = broadcast['id'], broadcast['last_chat_id']
 
+    total = await count_pending_chats(broadcast_id)
+    action = "Продолжаем" if broadcast['resumed'] else "Начинаем"
+    logger.info(f"📨 {action} рассылку #{broadcast_id}: осталось {total} чатов")
 
-# Массовая отправка с ограничением числа одновременных задач
-async def _preparer(file_id: str, caption: str | None = None, limit: int = 5):
-    chats = await get_all_chat_ids()
     semaphore = asyncio.Semaphore(limit)  # ограничиваем параллельные запросы
 
     async def sem_send(chat_id):
         async with semaphore:
-            await _send(chat_id, file_id, caption)
+            status = await _send(chat_id, file_id, caption)
+        await record_delivery(broadcast_id, chat_id, status)
+
+    started = time.monotonic()
+    done = 0
+    # Рассылка уступает очередь отправки остальным сообщениям
+    with outbound.priority(outbound.BULK):
+        while True:
+            chats = await fetch_pending_chats(broadcast_id, cursor, MAILING_BATCH_SIZE)
+            if not chats:
+                break
+
+            await asyncio.gather(*(sem_send(chat_id) for chat_id in chats))
+            cursor = chats[-1]
+            await save_checkpoint(broadcast_id, cursor)
+
+            done += len(chats)
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed else 0.0
+            eta = (total - done) / rate if rate else 0.0
+            logger.info(
+                f"📨 [{done}/{total}] {rate:.1f} чатов/сек, "
+                f"осталось ~{max(eta, 0.0) / 60:.1f} мин"
+            )
+
+    # Мёртвые чаты удаляем одним запросом
+    dead_chats = await get_dead_chats(broadcast_id)
+    await forget_chats(dead_chats)
 
-    tasks = [sem_send(chat_id) for chat_id in chats]
-    await asyncio.gather(*tasks)
+    statuses = await finish_broadcast(broadcast_id)
+    logger.info(
+        f"✅ Рассылка #{broadcast_id} завершена за {time.monotonic() - started:.0f} сек: "
+        f"доставлено {statuses.get('sent', 0)}, ошибок {statuses.get('failed', 0)}, "
+        f"удалено мёртвых чатов {len(dead_chats)}"
+    )
 
 
 async def sender(active: bool, text: str = "⚙️ Ваше сообщение.\n\n"):
@@ -52,7 +105,12 @@ async def sender(active: bool, text: str = "⚙️ Ваше сообщение.\
         await _preparer(picture, caption=text)
     finally:
         await close_db()
+        await bot.session.close()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
     asyncio.run(sender(False))
@@ -0,0 +1,122 @@
+import time
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot, html
+
+from config import CALL_MENTIONS_PER_MESSAGE, CALL_RESOLVE_BATCH, CALL_PROGRESS_INTERVAL
+from services.telegram import outbound
+from services.telegram.user_mention import resolve_mention_names, format_mention_link
+
+logger = logging.getLogger(__name__)
+
+# Лимит длины текста сообщения в Telegram (видимые символы, без HTML разметки)
+MAX_MESSAGE_LENGTH = 4096
+
+# chat_id -> задача идущего созыва
+_active_calls: dict[int, asyncio.Task] = {}
+
+
+def is_call_running(chat_id: int) -> bool:
+    return chat_id in _active_calls
+
+
+def pack_mentions(header: str, mentions: list[tuple[int, str]]) -> list[tuple[str, int]]:
+    """
+    Раскладывает упоминания по сообщениям: не больше CALL_MENTIONS_PER_MESSAGE
+    упоминаний и MAX_MESSAGE_LENGTH видимых символов в одном сообщении.
+    Возвращает пары (HTML текст, кол-во упоминаний).
+    """
+    messages = []
+    lines: list[str] = []
+    length = len(header)
+
+    for user_id, name in mentions:
+        # Слишком длинное имя обрезаем, чтобы упоминание влезло в сообщение
+        name = name[:MAX_MESSAGE_LENGTH - len(header) - 1]
+        if lines and (len(lines) >= CALL_MENTIONS_PER_MESSAGE or length + 1 + len(name) > MAX_MESSAGE_LENGTH):
+            messages.append((html.quote(header) + "\n".join(lines), len(lines)))
+            lines, length = [], len(header)
+
+        lines.append(format_mention_link(user_id, name))
+        length += len(name) + (1 if len(lines) > 1 else 0)
+
+    if lines:
+        messages.append((html.quote(header) + "\n".join(lines), len(lines)))
+    return messages
+
+
+async def _prepare(bot: Bot, chat_id: int, header: str, user_ids: list[int], queue: asyncio.Queue):
+    """Готовит сообщения созыва пачками и складывает в очередь, пока идёт отправка."""
+    cancelled = False
+    try:
+        for i in range(0, len(user_ids), CALL_RESOLVE_BATCH):
+            batch = user_ids[i:i + CALL_RESOLVE_BATCH]
+            mentions = await resolve_mention_names(bot, chat_id, batch)
+            for message in pack_mentions(header, mentions):
+                await queue.put(message)
+    except asyncio.CancelledError:
+        # Отменяет только сама отправка, когда завершается: конец очереди уже никто не ждёт,
+        # а ожидание места в полной очереди повисло бы навсегда
+        cancelled = True
+        raise
+    finally:
+        if not cancelled:
+            await queue.put(None)
+
+
+async def _run_call(bot: Bot, chat_id: int, reply_to_message_id: int, header: str, user_ids: list[int]):
+    total = len(user_ids)
+    queue: asyncio.Queue[Optional[tuple[str, int]]] = asyncio.Queue(maxsize=CALL_RESOLVE_BATCH)
+    status = producer = None
+
+    started = time.monotonic()
+    last_progress = started
+    sent_messages = 0
+    sent_mentions = 0
+    try:
+        status = await bot.send_message(
+            chat_id=chat_id, text=f"📣 Созыв {total} участников начат...",
+            reply_to_message_id=reply_to_message_id
+        )
+        producer = asyncio.create_task(_prepare(bot, chat_id, header, user_ids, queue))
+
+        while (message := await queue.get()) is not None:
+            text, mentions_count = message
+            await bot.send_message(chat_id=chat_id, text=text, reply_to_message_id=reply_to_message_id, parse_mode="HTML")
+            sent_messages += 1
+            sent_mentions += mentions_count
+
+            if time.monotonic() - last_progress >= CALL_PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                await status.edit_text(f"📣 Созыв: {sent_mentions}/{total} участников")
+
+        await producer # пробрасываем ошибку подготовки, если была
+        await status.edit_text(f"✅ Созыв завершён: {sent_mentions} участников, {sent_messages} сообщ.")
+        logger.info(
+            f"📣 Созыв в чате {chat_id}: {sent_mentions} участников, {sent_messages} сообщ. "
+            f"за {time.monotonic() - started:.0f} сек"
+        )
+    except Exception:
+        logger.exception(f"Созыв в чате {chat_id} прерван")
+        if status is None:
+            return # не удалось даже отправить сообщение о начале созыва
+        try:
+            await status.edit_text(f"❌ Созыв прерван: {sent_mentions}/{total} участников")
+        except Exception as e:
+            logger.warning(f"Не удалось обновить статус созыва в чате {chat_id}: {e}")
+    finally:
+        if producer is not None:
+            producer.cancel()
+
+
+def start_call(bot: Bot, chat_id: int, reply_to_message_id: int, text: str, user_ids: list[int]) -> None:
+    """Запускает созыв в фоне: сообщения уходят через очередь отправки с низким приоритетом."""
+    header = f"⚡ {text if text.strip() else 'Внимание!'}\n\n"
+
+    # Созыв уступает очередь отправки ответам на команды
+    with outbound.priority(outbound.BULK):
+        task = asyncio.create_task(_run_call(bot, chat_id, reply_to_message_id, header, user_ids))
+    _active_calls[chat_id] = task
+    task.add_done_callback(lambda _: _active_calls.pop(chat_id, None))
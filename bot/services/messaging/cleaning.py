@@ -4,7 +4,7 @@ from typing import Optional, Tuple
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup
 
-from services.telegram.user_mention import mention_user
+from services.telegram.user_mention import mention_users
 from db.chats.cleaning import check_cleaning_accuracy, minmsg_users, inactive_users, do_cleaning
 
 from services.time_utils import TimedeltaFormatter, serialize_timedelta
@@ -25,9 +25,8 @@ async def generate_minmsg_msg(bot: Bot, chat_id: int, page: int, msg_count: int)
     ans = ans_header
     ans += "<blockquote expandable>"
 
-    for i, u in enumerate(users):
-        mention = await mention_user(bot=bot, chat_id=chat_id, user_id=int(u["user_id"]))
-        
+    mentions = await mention_users(bot=bot, chat_id=chat_id, user_ids=[int(u["user_id"]) for u in users])
+    for i, (u, mention) in enumerate(zip(users, mentions)):
         percentage = (u['count'] / msg_count) * 100
         line = f"• {mention}: {u['count']} ({percentage:.0f}%)\n"
 
@@ -59,9 +58,8 @@ async def generate_inactive_msg(bot: Bot, chat_id: int, page: int, duration: tim
     ans = ans_header
     ans += "<blockquote expandable>"
 
-    for i, u in enumerate(users):
-        mention = await mention_user(bot=bot, chat_id=chat_id, user_id=int(u["user_id"]))
-
+    mentions = await mention_users(bot=bot, chat_id=chat_id, user_ids=[int(u["user_id"]) for u in users])
+    for i, (u, mention) in enumerate(zip(users, mentions)):
         date = TimedeltaFormatter.format(now - u["last_message_date"], suffix="none") if u["last_message_date"] else "никогда"
         line = f"• {mention}: уже {date}\n"
         ans += line
@@ -92,8 +90,8 @@ async def generate_cleaning_msg(bot: Bot, chat_id: int, page: int) -> Tuple[Opti
     ans = ans_header
     ans += "<blockquote expandable>"
 
-    for i, u in enumerate(users):
-        mention = await mention_user(bot=bot, chat_id=chat_id, user_id=int(u["user_id"]))
+    mentions = await mention_users(bot=bot, chat_id=chat_id, user_ids=[int(u["user_id"]) for u in users])
+    for i, (u, mention) in enumerate(zip(users, mentions)):
         date = TimedeltaFormatter.format(u["last_message"]) if u["last_message"] else "никогда"
         norm = f"{u["message_count"]}/{data["min_messages"]} сообщ."
 
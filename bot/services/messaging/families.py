@@ -8,10 +8,11 @@ from db.marriages import get_user_marriage
 from db.marriages.families import get_family_tree_data, is_child, is_ancestor
 
 from services.web.families import make_family_tree
+from services.web.render_cache import as_input_file
 from services.telegram.keyboards.pagination import get_pagination_keyboard
 
 
-async def generate_family_tree_msg(bot: Bot, chat_id: int, user_entity: User, with_back_button: bool = False) -> Tuple[Optional[str], Optional[InlineKeyboardMarkup], Optional[BufferedInputFile]]:
+async def generate_family_tree_msg(bot: Bot, chat_id: int, user_entity: User, with_back_button: bool = False) -> Tuple[Optional[str], Optional[InlineKeyboardMarkup], Optional[str | BufferedInputFile]]:
     user_id = int(user_entity.id)
     family_tree_data = await get_family_tree_data(chat_id, user_id)
 
@@ -21,7 +22,7 @@ async def generate_family_tree_msg(bot: Bot, chat_id: int, user_entity: User, wi
     mention = await mention_user(bot=bot, chat_id=chat_id, user_entity=user_entity)
     family_tree_bytes = await make_family_tree(family_tree_data)
 
-    photo = BufferedInputFile(family_tree_bytes, filename="family_tree.jpeg")
+    photo = as_input_file(family_tree_bytes, filename="family_tree.jpeg")
     keyboard = await get_pagination_keyboard(
         subject = "family", query=user_id, next_page=None,
         prev_page=None, back_button_active=with_back_button
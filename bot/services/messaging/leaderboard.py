@@ -1,34 +1,31 @@
 from typing import Tuple, Optional
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 from aiogram.types import InlineKeyboardMarkup
 
-from services.telegram.user_mention import mention_user
+from services.telegram.user_mention import mention_users
 from services.time_utils import TimedeltaFormatter, serialize_timedelta
 from services.telegram.keyboards.pagination import get_pagination_keyboard
 from db.leaderboard import user_leaderboard
 
 async def generate_leaderboard_msg(bot, chat_id: int, page: int, duration: Optional[timedelta]) -> Tuple[Optional[str], Optional[InlineKeyboardMarkup]]:
     if duration:
-        since = datetime.now(timezone.utc) - duration
         beauty_since = TimedeltaFormatter.format(duration, suffix="none")
     else:
-        since = None
         beauty_since = "всё время"
 
     per_page = 20
-    data = await user_leaderboard(chat_id, since=since, page=page, per_page=per_page)
+    data = await user_leaderboard(chat_id, duration=duration, page=page, per_page=per_page)
     if not data:
         return None, None
     top = data["data"]
     
-    msg_count = sum(u["count"] for u in top)
+    msg_count = data["total"]
     ans = f"📊 Топ активности за {beauty_since}:\n\n"
 
     adder = per_page * (page - 1)
     ans += "<blockquote expandable>"
-    for i, u in enumerate(top):
-        mention = await mention_user(bot=bot, chat_id=chat_id, user_id=int(u["user_id"]))
-        
+    mentions = await mention_users(bot=bot, chat_id=chat_id, user_ids=[int(u["user_id"]) for u in top])
+    for i, (u, mention) in enumerate(zip(top, mentions)):
         percentage = (u["count"] / msg_count * 100) if msg_count > 0 else 0
         
         ans += f"{adder+i+1} {mention}: {u['count']} (вклад: {percentage:.1f}%)\n"
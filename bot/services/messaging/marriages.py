@@ -5,7 +5,7 @@ from typing import Optional, Tuple
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup
 
-from services.telegram.user_mention import mention_user
+from services.telegram.user_mention import mention_user, mention_users
 from db.marriages import get_marriages, get_user_marriage, delete_marriage
 from db.marriages.families import incest_cycle
 
@@ -22,10 +22,13 @@ async def generate_all_marriages_msg(bot: Bot, chat_id: int, page: int) -> Tuple
     ans = f"💕 Пары нашего чата:\n\n"
 
     ans += "<blockquote expandable>"
+    mentions = await mention_users(
+        bot=bot, chat_id=chat_id,
+        user_ids=[int(uid) for m in marriages for uid in m["participants"][:2]]
+    )
     for i, m in enumerate(marriages):
-        mention_1 = await mention_user(bot=bot, chat_id=chat_id, user_id=int(m["participants"][0]))
-        mention_2 = await mention_user(bot=bot, chat_id=chat_id, user_id=int(m["participants"][1]))
-        
+        mention_1, mention_2 = mentions[2*i], mentions[2*i + 1]
+
         date = f"{m['date']:%d.%m.%Y} ({TimedeltaFormatter.format(now - m['date'], suffix='none')})"
         line = f"• {mention_1} & {mention_2}\n   └ Вместе с {date}\n\n"
         
@@ -87,9 +90,7 @@ async def delete_marriage_and_notify(bot: Bot, chat_id: int, user_id: int, left_
 
     children_mentions = []
     if children:
-        for child_id in children:
-            child_mention = await mention_user(bot=bot, chat_id=chat_id, user_id=child_id)
-            children_mentions.append(child_mention)
+        children_mentions = await mention_users(bot=bot, chat_id=chat_id, user_ids=children)
 
     # Формируем текст сообщения
     reason = "покинул чат" if left_chat else "подал на развод"
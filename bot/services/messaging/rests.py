@@ -4,7 +4,7 @@ from typing import Optional, Tuple
 from aiogram import Bot
 from aiogram.types import User, InlineKeyboardMarkup
 
-from services.telegram.user_mention import mention_user
+from services.telegram.user_mention import mention_user, mention_users
 from db.users.rests import get_all_rests, get_user_rest
 
 from services.time_utils import TimedeltaFormatter
@@ -22,8 +22,8 @@ async def generate_all_rests_msg(bot: Bot, chat_id: int, page: int) -> Tuple[Opt
     ans = ans_header
 
     ans += "<blockquote expandable>"
-    for i, r in enumerate(rests):
-        mention = await mention_user(bot=bot, chat_id=chat_id, user_id=int(r["user_id"]))
+    mentions = await mention_users(bot=bot, chat_id=chat_id, user_ids=[int(r["user_id"]) for r in rests])
+    for i, (r, mention) in enumerate(zip(rests, mentions)):
         rest_info = f"до {r['valid_until']:%d.%m.%Y} (еще {TimedeltaFormatter.format(r['valid_until'] - now, suffix="none")})"
         line = f"• {mention} - {rest_info}\n"
 
@@ -12,8 +12,9 @@ from db.messages.statistics import user_stats, get_favorite_word
 from services.time_utils import TimedeltaFormatter
 from services.telegram.keyboards.user_info import get_user_info_keyboard
 from services.web.activity_chart import make_activity_chart
+from services.web.render_cache import as_input_file
 
-async def generate_user_info_msg(bot: Bot, chat_id: int, user_entity: User) -> Tuple[Optional[str], Optional[InlineKeyboardMarkup], Optional[BufferedInputFile]]:
+async def generate_user_info_msg(bot: Bot, chat_id: int, user_entity: User) -> Tuple[Optional[str], Optional[InlineKeyboardMarkup], Optional[str | BufferedInputFile]]:
     user_id = int(user_entity.id)
 
     stats = await user_stats(chat_id, user_id)
@@ -48,7 +49,7 @@ async def generate_user_info_msg(bot: Bot, chat_id: int, user_entity: User) -> T
         ans += f"Рест: (не активен)\n"
 
     ans += f"Актив (24ч|7дн|30дн|∞): {stats["activity"]["day_count"]} | {stats["activity"]["week_count"]} | {stats["activity"]["month_count"]} | {stats["activity"]["total"]}\n"
-    uploaded_img = BufferedInputFile(img, filename="stats.png")
+    uploaded_img = as_input_file(img, filename="stats.png")
     keyboard = await get_user_info_keyboard(user_id)
 
     return ans, keyboard, uploaded_img
\ No newline at end of file
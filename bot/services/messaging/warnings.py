@@ -4,7 +4,7 @@ from typing import Optional, Tuple
 from aiogram import Bot
 from aiogram.types import User, InlineKeyboardMarkup
 
-from services.telegram.user_mention import mention_user
+from services.telegram.user_mention import mention_user, mention_users
 from db.warnings import get_all_warnings, get_user_warnings
 from db.chats.settings import get_max_warns
 
@@ -23,8 +23,8 @@ async def generate_all_warnings_msg(bot: Bot, chat_id: int, page: int) -> Tuple[
     ans = f"📛 Список предупреждений:\n\n"
 
     ans += "<blockquote expandable>"
-    for i, u in enumerate(users_with_warnings):
-        mention = await mention_user(bot=bot, chat_id=chat_id, user_id=int(u["user_id"]))
+    mentions = await mention_users(bot=bot, chat_id=chat_id, user_ids=[int(u["user_id"]) for u in users_with_warnings])
+    for i, (u, mention) in enumerate(zip(users_with_warnings, mentions)):
         line = f"• {mention} - {u['count']}/{max_warns}\n"
         
         ans += line
@@ -53,10 +53,10 @@ async def generate_user_warnings_msg(bot: Bot, chat_id: int, target_user: User,
 
     adder = per_page * (page - 1)
     ans += "<blockquote expandable>"
-    for i, w in enumerate(warnings):
+    moderator_mentions = await mention_users(bot=bot, chat_id=chat_id, user_ids=[w["administrator_user_id"] for w in warnings])
+    for i, (w, moderator_mention) in enumerate(zip(warnings, moderator_mentions)):
         reason = w["reason"] or "Причина не указана."
         date = TimedeltaFormatter.format(datetime.now(timezone.utc) - w["assignment_date"])
-        moderator_mention = await mention_user(bot=bot, chat_id=chat_id, user_id=w["administrator_user_id"])
         formatted_expire_date = TimedeltaFormatter.format(w["expire_date"] - datetime.now(timezone.utc), suffix="none") if w["expire_date"] else "навсегда"
 
         ans += f"┌ Варн #{adder+i+1}\n├ Срок: {formatted_expire_date}\n├ Причина: {reason}\n├ Модератор: {moderator_mention}\n└ Выдан: {date}\n\n"
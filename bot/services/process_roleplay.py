@@ -1,71 +1,106 @@
-import re
 from aiogram import Bot, html
 from aiogram.types import User
+from collections import Counter
 from typing import Optional
 
 from config import RP_COMMANDS
+from utils.command_trie import CommandTrie
 from services.telegram.user_mention import mention_user
 
+# Глобальные команды компилируются один раз при старте
+_GLOBAL_COMMANDS = CommandTrie(RP_COMMANDS)
+
+# Сколько сообщений завершили обработку на каждом этапе РП конвейера
+_stage_exits: Counter = Counter()
+
+
+def record_rp_stage(stage: str) -> None:
+    """Учитывает сообщение, завершившее обработку на этапе stage."""
+    _stage_exits[stage] += 1
+
+
+def get_rp_pipeline_stats() -> dict[str, int]:
+    """Количество сообщений, вышедших из РП конвейера на каждом этапе."""
+    return dict(_stage_exits)
+
+
+def may_be_rp_command(text: str, user_heads: frozenset[str] | None = None) -> bool:
+    """
+    Этап 1 РП конвейера, только в памяти: в начале текста глобальная команда
+    или первая буква одной из команд пользователя (их дерево грузится уже после).
+    """
+    if match_rp_command(text):
+        return True
+    if not user_heads:
+        return False
+
+    main_line = text.split('\n', maxsplit=1)[0].strip()
+    return main_line[:1].lower() in user_heads
+
+
+def match_rp_command(text: str, user_rp_trie: CommandTrie | None = None) -> Optional[dict]:
+    """
+    Ищет РП команду в начале текста без обращений к сети и БД.
+
+    Пользовательские команды накладываются поверх глобальных:
+    при совпадении одинаковой длины побеждает команда пользователя.
+
+    Returns:
+        Словарь с шаблоном ответа, аргументом действия и комментарием или None.
+    """
+    # Разделяем текст и комментарий (по первой новой строке)
+    parts = text.split('\n', maxsplit=1)
+    main_line = parts[0].strip()
+    comment_text = parts[1].strip() if len(parts) > 1 else None
+
+    if not main_line:
+        return None
+
+    match = _GLOBAL_COMMANDS.match(main_line)
+    if user_rp_trie:
+        user_match = user_rp_trie.match(main_line)
+        if user_match and (not match or user_match[2] >= match[2]):
+            match = user_match
+
+    if not match:
+        return None
+
+    _, response_template, end = match
+    if not len(response_template):
+        return None
+
+    return {
+        "template": response_template,
+        "argument": main_line[end:].strip(), # Аргумент (например "крепко")
+        "comment": comment_text,
+    }
+
+
 async def parse_rp_command(
     bot: Bot, 
     chat_id: int, 
     text: str, 
     trigger_user_entity: User, 
     target_user_entity: Optional[User],
-    user_rp_commands: dict | None = None
+    user_rp_trie: CommandTrie | None = None
 ) -> str | None:
     """
     Парсит РП команду.
     Логика:
     1. Отделяем комментарий.
-    2. Ищем команду в начале строки (Regex).
+    2. Ищем команду в начале строки (префиксное дерево).
     3. Всё остальное — аргумент действия.
     4. Цель берется строго из target_user_entity.
     """
 
-    # 1. Разделяем текст и комментарий (по первой новой строке)
-    parts = text.split('\n', maxsplit=1)
-    main_line = parts[0].strip()
-    comment_text = parts[1].strip() if len(parts) > 1 else None
-
-    if not main_line:
-        return None
-
-    # 2. Собираем и сортируем команды
-    # Объединяем глобальные и пользовательские команды
-    # Если user_rp_commands is None, используем {}
-    all_commands = {**RP_COMMANDS, **(user_rp_commands or {})}
-    
-    if not all_commands:
-        return None
-
-    # Сортируем по длине (от длинных к коротким), чтобы "поцеловать" не сработало раньше "жарко поцеловать"
-    # Экранируем команды (re.escape), чтобы спецсимволы в командах не ломали regex
-    sorted_keys = sorted(all_commands.keys(), key=len, reverse=True)
-    escaped_keys = [re.escape(cmd) for cmd in sorted_keys]
-
-    # 3. Строим Regex: ^(cmd1|cmd2|cmd3)(?:\s+|$)(.*)
-    # ^             - начало строки
-    # (cmd1|cmd2)   - одна из команд (группа 1)
-    # (?:\s+|$)     - после команды должен быть пробел ИЛИ конец строки (чтобы чмок не сработало на чмокнуть)
-    # (.*)          - всё остальное (аргумент) (группа 2)
-    pattern = re.compile(rf"^({'|'.join(escaped_keys)})(?:\s+|$)(.*)", re.IGNORECASE | re.DOTALL)
-
-    match = pattern.match(main_line)
-    
+    # 1-3. Ищем команду и отделяем аргумент и комментарий
+    match = match_rp_command(text, user_rp_trie)
     if not match:
         return None
 
-    # Извлекаем данные из Regex
-    # Так как мы делали re.IGNORECASE, то match.group(1) вернет текст ИЗ СООБЩЕНИЯ (например "поцеловать").
-    # Нам нужно найти оригинальный ключ в словаре.
-    command_from_text = match.group(1).lower()
-    action_argument = match.group(2).strip() # Аргумент (например "крепко")
-
-    # Получаем шаблон. Пытаемся найти по нижнему регистру.
-    response_template: str = all_commands.get(command_from_text, "")
-    if not len(response_template):
-        return None
+    response_template = match["template"]
+    action_argument = match["argument"]
+    comment_text = match["comment"]
 
     # 4. Формируем ссылки
     trigger_link = await mention_user(bot=bot, chat_id=chat_id, user_entity=trigger_user_entity)
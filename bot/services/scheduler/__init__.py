@@ -1,21 +1,204 @@
 import asyncio
+import heapq
 import logging
+import time as clock
+from datetime import datetime, timezone, timedelta, time
+from typing import Optional
+
 from aiogram import Bot
 
+from config import SCHEDULER_RESYNC_INTERVAL, SCHEDULER_RETRY_DELAY
+from db.users.rests import get_next_rest_expiry
+from db.warnings import get_next_warning_expiry
+from db.chats.cleaning import fetch_auto_cleaning_schedules
 from services.scheduler.jobs.cleaning import run_cleanings
 from services.scheduler.jobs.rests import expire_rests
 from services.scheduler.jobs.warnings import expire_warnings
+from services.scheduler.jobs.words import prune_word_counts_job, next_word_counts_prune
+from services.telegram import outbound
+
+logger = logging.getLogger(__name__)
+
+# Задачи планировщика
+RESTS = "rests"
+WARNINGS = "warnings"
+CLEANING = "cleaning"
+WORD_COUNTS = "word_counts"
+
+# Минимальная пауза перед повторным запуском той же задачи (сек),
+# чтобы расхождение часов бота и БД не зациклило запуски
+_RERUN_DELAY = 1
+
+
+def next_cleaning_time(day_of_week: int, cleaning_time: time,
+                       last_cleaning_at: Optional[datetime], now: datetime) -> datetime:
+    """
+    Ближайшее время автоочистки (UTC).
+    Если сегодня день чистки, время уже прошло, а чистки ещё не было — чистка нужна сейчас.
+    """
+    days_ahead = (day_of_week - now.isoweekday()) % 7
+    due = datetime.combine(now.date() + timedelta(days=days_ahead), cleaning_time.replace(tzinfo=None),
+                           tzinfo=timezone.utc)
+
+    if days_ahead == 0:
+        cleaned_today = last_cleaning_at is not None and last_cleaning_at.astimezone(timezone.utc).date() >= now.date()
+        if cleaned_today:
+            return due + timedelta(days=7)
+        return max(due, now)
+
+    return due
+
+
+async def _next_cleaning_deadline() -> Optional[datetime]:
+    now = datetime.now(timezone.utc)
+    schedules = await fetch_auto_cleaning_schedules()
+    return min((
+        next_cleaning_time(s["day_of_week"], s["time"], s["last_cleaning_at"], now)
+        for s in schedules if s["day_of_week"] is not None and s["time"] is not None
+    ), default=None)
+
+
+async def _expire_warnings(bot: Bot):
+    await expire_warnings()
+
+
+# Задача -> (запуск, ближайший дедлайн из БД)
+JOBS = {
+    RESTS: (expire_rests, get_next_rest_expiry),
+    WARNINGS: (_expire_warnings, get_next_warning_expiry),
+    CLEANING: (run_cleanings, _next_cleaning_deadline),
+    WORD_COUNTS: (prune_word_counts_job, next_word_counts_prune),
+}
+
+
+class Scheduler:
+    """
+    Планировщик по дедлайнам.
+
+    Держит кучу (время, задача) и спит ровно до ближайшего дедлайна.
+    Дедлайны загружаются из БД при старте и после каждого запуска задачи,
+    а из процесса обновляются через notify(). Каждая задача выполняется
+    в отдельной asyncio задаче: медленная или упавшая не задерживает остальные.
+    """
+
+    def __init__(self):
+        self._bot: Optional[Bot] = None
+        self._heap: list[tuple[float, str]] = []
+        self._deadlines: dict[str, float] = {} # актуальный дедлайн задачи, остальные записи в куче устарели
+        self._running: dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot: Bot) -> None:
+        self._bot = bot
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._running.values()) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running.clear()
+
+    def _set(self, job: str, when: float) -> None:
+        if self._deadlines.get(job) == when:
+            return
+        self._deadlines[job] = when
+        heapq.heappush(self._heap, (when, job))
+        if self._heap[0] == (when, job):
+            self._wakeup.set()
+
+    def notify(self, job: str, when: Optional[datetime]) -> None:
+        """Сообщает о новом дедлайне задачи (например, выдан рест); поздние дедлайны подхватятся из БД сами."""
+        if when is None:
+            return
+        timestamp = when.timestamp()
+        current = self._deadlines.get(job)
+        if current is None or timestamp < current:
+            self._set(job, timestamp)
+
+    async def _reschedule(self, job: str, not_before: float = 0.0) -> None:
+        """Перечитывает ближайший дедлайн задачи из БД."""
+        _, next_deadline = JOBS[job]
+        try:
+            when = await next_deadline()
+        except Exception:
+            logger.exception(f"Не удалось получить дедлайн задачи {job}")
+            self._set(job, clock.time() + SCHEDULER_RETRY_DELAY)
+            return
+
+        if when is None:
+            self._deadlines.pop(job, None)
+        else:
+            self._set(job, max(when.timestamp(), not_before))
+
+    async def _run_job(self, job: str) -> None:
+        run, _ = JOBS[job]
+        started = clock.monotonic()
+        failed = False
+        try:
+            with outbound.priority(outbound.SCHEDULED):
+                await run(self._bot)
+        except Exception:
+            failed = True
+            logger.exception(f"Задача планировщика {job} завершилась ошибкой")
+        finally:
+            self._running.pop(job, None)
+
+        logger.debug(f"Задача {job} выполнена за {clock.monotonic() - started:.2f} сек")
+        delay = SCHEDULER_RETRY_DELAY if failed else _RERUN_DELAY
+        await self._reschedule(job, not_before=clock.time() + delay)
+
+    def _start_due(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            when, job = heapq.heappop(self._heap)
+            if self._deadlines.get(job) != when:
+                continue # дедлайн уже сдвинули
+
+            del self._deadlines[job]
+            if job in self._running:
+                continue # после завершения задача сама перечитает дедлайн
+
+            self._running[job] = asyncio.create_task(self._run_job(job))
+
+    async def _resync(self) -> None:
+        await asyncio.gather(*(
+            self._reschedule(job) for job in JOBS if job not in self._running
+        ))
+
+    async def _run(self) -> None:
+        logger.info("⚙️ Scheduler started...")
+        next_resync = 0.0
+        while True:
+            now = clock.time()
+            if now >= next_resync:
+                # Подхватываем дедлайны, изменённые не через notify()
+                await self._resync()
+                next_resync = now + SCHEDULER_RESYNC_INTERVAL
+
+            self._start_due(clock.time())
+
+            next_at = self._heap[0][0] if self._heap else next_resync
+            timeout = max(0.0, min(next_at, next_resync) - clock.time())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Глобальный планировщик
+scheduler = Scheduler()
+
+
+def start(bot: Bot) -> None:
+    scheduler.start(bot)
+
 
-async def scheduler(bot: Bot):
-    logging.info("⚙️ Scheduler started...")
-    while True:
-        # Выполняем задачи
-        await expire_rests(bot)
-        await expire_warnings()
-        await run_cleanings(bot)
+async def stop() -> None:
+    await scheduler.stop()
 
-        wait_seconds = 60
-        await asyncio.sleep(wait_seconds)
 
-def start(bot: Bot):
-    asyncio.create_task(scheduler(bot))
+def notify(job: str, when: Optional[datetime]) -> None:
+    scheduler.notify(job, when)
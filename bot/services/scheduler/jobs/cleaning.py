@@ -1,17 +1,75 @@
+import asyncio
+import logging
+import time
+
 from aiogram import Bot
-from datetime import datetime, timezone
+from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
 
+from config import CLEANING_CONCURRENCY
 from db.chats.cleaning import fetch_chats_for_scheduled_cleaning, update_last_cleaning_time
 from services.messaging.cleaning import generate_cleaning_msg
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Сколько чатов одновременно готовят отчёт; лимиты отправки соблюдает диспетчер отправок
+_db_slots = asyncio.Semaphore(CLEANING_CONCURRENCY)
+
+
+async def _clean_chat(bot: Bot, chat_id: int) -> float:
+    """Проводит автоочистку одного чата и возвращает её длительность."""
+    started = time.perf_counter()
+    async with _db_slots:
+        text, keyboard = await generate_cleaning_msg(bot, chat_id, 1)
+    try:
+        if text:
+            await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML", reply_markup=keyboard)
+    except (TelegramForbiddenError, TelegramBadRequest):
+        # Повтор не поможет (бота исключили, нет прав) — чистка на этой неделе всё равно считается проведённой
+        await update_last_cleaning_time(chat_id)
+        raise
+
+    # Отмечаем чистку только после отправки: чат с ошибкой попадёт в повторный запуск задачи
+    await update_last_cleaning_time(chat_id)
+    return time.perf_counter() - started
 
 
 async def run_cleanings(bot: Bot):
     """Запускает чистку для всех чатов с включенной автоматической чисткой."""
-    now = datetime.now(timezone.utc)
+    chats = [int(chat_id) for chat_id in await fetch_chats_for_scheduled_cleaning()]
+    if not chats:
+        return
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(_clean_chat(bot, chat_id) for chat_id in chats),
+        return_exceptions=True
+    )
+
+    durations = []
+    run_duration = Histogram() # длительность чистки одного чата (подготовка + отправка) в этом запуске
+    errors = 0
+    failed = [] # чаты с ошибками не от Telegram (БД и т.п.) — их стоит повторить
+    for chat_id, result in zip(chats, results):
+        if isinstance(result, (TelegramForbiddenError, TelegramBadRequest)):
+            errors += 1
+            logger.warning(f"Не удалось отправить чистку в чат {chat_id}: {result}")
+        elif isinstance(result, BaseException):
+            errors += 1
+            failed.append(chat_id)
+            logger.error(f"Автоочистка чата {chat_id} завершилась ошибкой", exc_info=result)
+        else:
+            durations.append((result, chat_id))
+            run_duration.observe(result)
 
-    chats = await fetch_chats_for_scheduled_cleaning()
-    for chat_id in chats:
-        await update_last_cleaning_time(int(chat_id))
+    slowest = ", ".join(f"{chat_id} ({duration:.1f} сек)" for duration, chat_id in sorted(durations, reverse=True)[:3])
+    logger.info(
+        f"🧹 Автоочистка: {len(chats)} чатов за {time.perf_counter() - started:.1f} сек, "
+        f"ошибок {errors}; p50 {run_duration.quantile(0.5):.1f} сек, "
+        f"p95 {run_duration.quantile(0.95):.1f} сек; самые долгие: {slowest or '-'}"
+    )
 
-        text, keyboard = await generate_cleaning_msg(bot, int(chat_id), 1)
-        await bot.send_message(chat_id=int(chat_id), text=text, parse_mode="HTML", reply_markup=keyboard)
+    # Ошибка задачи — сигнал планировщику повторить её через SCHEDULER_RETRY_DELAY,
+    # а не сразу: иначе упавшие чаты перезапускались бы каждую секунду
+    if failed:
+        raise RuntimeError(f"Автоочистка не удалась в {len(failed)} чатах: {', '.join(map(str, failed[:10]))}")
@@ -0,0 +1,35 @@
+import logging
+import random
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from aiogram import Bot
+
+from config import WORD_COUNTS_PRUNE_INTERVAL, WORD_COUNTS_TOP_K
+from db.messages.words import prune_all_word_counts
+
+logger = logging.getLogger(__name__)
+
+# Время последней обрезки (None — после старта ещё не было)
+_last_run: Optional[datetime] = None
+# Первая обрезка — в случайный момент интервала после старта, а не сразу:
+# частые перезапуски не должны каждый раз обходить все чаты
+_first_run = datetime.now(timezone.utc) + timedelta(seconds=random.uniform(0, WORD_COUNTS_PRUNE_INTERVAL))
+
+
+async def prune_word_counts_job(bot: Bot):
+    """Обрезает частоты слов до WORD_COUNTS_TOP_K на пользователя, чтобы таблица не росла бесконечно."""
+    global _last_run
+
+    started = time.perf_counter()
+    removed = await prune_all_word_counts(WORD_COUNTS_TOP_K)
+    _last_run = datetime.now(timezone.utc)
+
+    logger.info(f"🔤 Частоты слов обрезаны: удалено {removed} строк за {time.perf_counter() - started:.2f} сек")
+
+
+async def next_word_counts_prune() -> Optional[datetime]:
+    if _last_run is None:
+        return _first_run
+    return _last_run + timedelta(seconds=WORD_COUNTS_PRUNE_INTERVAL)
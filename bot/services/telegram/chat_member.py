@@ -6,11 +6,53 @@ from aiogram import Bot
 from aiogram.types import ChatMember
 from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 
+from config import CHAT_MEMBER_CACHE_SIZE, CHAT_MEMBER_CACHE_TTL, CHAT_MEMBER_NEGATIVE_CACHE_TTL
+from utils.cache import TTLCache, MISSING
+
 logger = logging.getLogger(__name__)
 
 # Глобальный семафор для ограничения количества одновременных запросов к Telegram API
 _TG_API_SEMAPHORE = asyncio.Semaphore(20)
 
+# (chat_id, user_id) -> ChatMember или None, если участник не найден
+_member_cache = TTLCache(maxsize=CHAT_MEMBER_CACHE_SIZE, ttl=CHAT_MEMBER_CACHE_TTL)
+
+
+def cache_chat_member(chat_id: int, user_id: int, member: ChatMember) -> None:
+    """
+    Кладёт в кэш актуальные данные участника (например, из апдейта chat_member).
+
+    Args:
+        chat_id: ID чата.
+        user_id: ID пользователя.
+        member: Новый объект ChatMember.
+    """
+    _member_cache.set((chat_id, user_id), member)
+
+
+def invalidate_chat_member(chat_id: int, user_id: Optional[int] = None) -> None:
+    """
+    Удаляет из кэша участника чата (или всех участников чата).
+
+    Args:
+        chat_id: ID чата.
+        user_id: ID пользователя. Если не указан — сбрасывается весь чат.
+    """
+    if user_id is not None:
+        _member_cache.pop((chat_id, user_id))
+    else:
+        _member_cache.invalidate(lambda key: key[0] == chat_id)
+
+
+def get_chat_member_cache_stats() -> dict:
+    """
+    Возвращает статистику кэша участников.
+
+    Returns:
+        Словарь с размером кэша, количеством попаданий, промахов и долей попаданий.
+    """
+    return _member_cache.stats()
+
 
 async def _with_tg_rate_limit(coro):
     """
@@ -84,6 +126,8 @@ async def get_chat_member(
     """
     Получает информацию об участнике чата с обработкой ошибок.
 
+    Результат кэшируется на CHAT_MEMBER_CACHE_TTL секунд, а отсутствие
+    участника — на CHAT_MEMBER_NEGATIVE_CACHE_TTL секунд.
     Функция безопасна для вызова - все возможные исключения
     Telegram API перехватываются и логируются.
 
@@ -95,14 +139,22 @@ async def get_chat_member(
     Returns:
         Объект ChatMember, если участник найден, иначе None.
     """
+    key = (chat_id, user_id)
+    cached = _member_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
     try:
-        return await _with_tg_rate_limit(
+        member = await _with_tg_rate_limit(
             _fetch_chat_member_with_retry(bot, chat_id, user_id)
         )
+        _member_cache.set(key, member)
+        return member
     except TelegramBadRequest as e:
         logger.warning(
             f"Не удалось получить участника {user_id} в чате {chat_id}: {e}"
         )
+        _member_cache.set(key, None, ttl=CHAT_MEMBER_NEGATIVE_CACHE_TTL)
         return None
     except Exception as e:
         logger.error(
@@ -1,19 +1,67 @@
 from aiogram import Bot
 from aiogram.types import Message, UserProfilePhotos
 from services.telegram.media.info import get_mime_type
-from services.telegram.media.fetch import fetch_bytes
+from services.telegram.media.fetch import download_file
+from config import (
+    MAX_MEDIA_FILE_SIZE, MEDIA_CACHE_MAX_BYTES, MEDIA_CACHE_DIR, MEDIA_CACHE_DISK_MAX_BYTES,
+    MEDIA_FILE_ID_CACHE_SIZE, AVATAR_CACHE_SIZE, AVATAR_CACHE_TTL
+)
+from utils.cache import TTLCache, ByteCache, MISSING
+
+# Содержимое файлов по file_unique_id (не меняется, поэтому без TTL — только LRU по объёму)
+_media_cache = ByteCache(
+    max_bytes=MEDIA_CACHE_MAX_BYTES,
+    directory=MEDIA_CACHE_DIR,
+    disk_max_bytes=MEDIA_CACHE_DISK_MAX_BYTES
+)
+# file_id -> file_unique_id, чтобы повторно не вызывать get_file
+_unique_ids = TTLCache(maxsize=MEDIA_FILE_ID_CACHE_SIZE)
+# user_id -> (file_id, file_unique_id) текущей аватарки или None, если её нет
+_avatars = TTLCache(maxsize=AVATAR_CACHE_SIZE, ttl=AVATAR_CACHE_TTL)
+
+
+async def fetch_media_bytes(bot: Bot, file_id: str, file_unique_id: str | None = None) -> bytes:
+    """
+    Скачивает файл из Telegram через кэш.
+
+    Raises:
+        FileTooLarge: Если файл больше допустимого размера.
+    """
+    unique_id = file_unique_id or _unique_ids.get(file_id, None)
+    if unique_id:
+        data = await _media_cache.get(unique_id)
+        if data is not None:
+            return data
+
+    file = await bot.get_file(file_id)
+    _unique_ids.set(file_id, file.file_unique_id)
+    if file.file_unique_id != unique_id:
+        data = await _media_cache.get(file.file_unique_id)
+        if data is not None:
+            return data
+
+    data = await download_file(file)
+    await _media_cache.set(file.file_unique_id, data)
+    return data
 
 async def get_user_avatar(bot: Bot, user_id: int) -> bytes | None:
-    avatar_data: UserProfilePhotos = await bot.get_user_profile_photos(user_id, offset=0, limit=1)
-    if avatar_data.total_count == 0: return None
+    avatar = _avatars.get(user_id)
+    if avatar is MISSING:
+        avatar_data: UserProfilePhotos = await bot.get_user_profile_photos(user_id, offset=0, limit=1)
+        if avatar_data.total_count == 0:
+            avatar = None
+        else:
+            sizes = avatar_data.photos[0]  # список PhotoSize
+            best = max(sizes, key=lambda p: (p.width or 0) * (p.height or 0))
+            avatar = (best.file_id, best.file_unique_id)
+        _avatars.set(user_id, avatar)
 
-    sizes = avatar_data.photos[0]  # список PhotoSize
-    best = max(sizes, key=lambda p: (p.width or 0) * (p.height or 0))
-    bytes = await fetch_bytes(bot, best.file_id)
-    return bytes
+    if avatar is None: return None
+    return await fetch_media_bytes(bot, *avatar)
 
 async def get_quotable_media_id(message: Message) -> dict | None:
     file_id = None
+    file_unique_id = None
     file_size = 0
 
     thumb = None
@@ -22,6 +70,7 @@ async def get_quotable_media_id(message: Message) -> dict | None:
     if message.photo:
         photo = message.photo[-1]
         file_id = photo.file_id
+        file_unique_id = photo.file_unique_id
         file_size = photo.file_size
 
     # 2. Видео
@@ -38,15 +87,17 @@ async def get_quotable_media_id(message: Message) -> dict | None:
             thumb = message.sticker.thumbnail
         else:
             file_id = message.sticker.file_id
+            file_unique_id = message.sticker.file_unique_id
             file_size = message.sticker.file_size
     
     # Обрабатываем thumbnail, если есть
     if thumb:
         file_id = thumb.file_id
+        file_unique_id = thumb.file_unique_id
         file_size = thumb.file_size
     
-    if file_id and file_size and file_size <= 10 * 1024 * 1024:  # ≤ 10 МБ
-        return {"file_id": file_id, "file_size": file_size}
+    if file_id and file_size and file_size <= MAX_MEDIA_FILE_SIZE:  # ≤ 10 МБ
+        return {"file_id": file_id, "file_unique_id": file_unique_id, "file_size": file_size}
     
     return None
 
@@ -58,8 +109,8 @@ async def get_message_media(bot, message: Message) -> dict | None:
     file_size = media_info["file_size"]
 
     # Если нашли медиа
-    if file_id and file_size and file_size <= 10 * 1024 * 1024:  # ≤ 10 МБ
-        file_bytes = await fetch_bytes(bot, file_id)
+    if file_id and file_size and file_size <= MAX_MEDIA_FILE_SIZE:  # ≤ 10 МБ
+        file_bytes = await fetch_media_bytes(bot, file_id, media_info["file_unique_id"])
 
         # Получаем mime type
         mime_type = await get_mime_type(file_bytes)
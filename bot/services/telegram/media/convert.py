@@ -1,7 +1,15 @@
 import io
-from PIL import Image
+import logging
+from PIL import Image, ImageOps
+
+from services.executor import run_cpu
+
+logger = logging.getLogger(__name__)
 
 async def image_bytes_to_webp(image_bytes: bytes, quality: int = 80) -> bytes:
+    return await run_cpu(_to_webp, image_bytes, quality)
+
+def _to_webp(image_bytes: bytes, quality: int) -> bytes:
     input_buffer = io.BytesIO(image_bytes)
     output_buffer = io.BytesIO()
 
@@ -15,3 +23,40 @@ async def image_bytes_to_webp(image_bytes: bytes, quality: int = 80) -> bytes:
         )
 
     return output_buffer.getvalue()
+
+def fit_image(image_bytes: bytes, max_side: int, square: bool = False, quality: int = 85) -> tuple[bytes, str]:
+    """
+    Уменьшает картинку до max_side пикселей по большей стороне
+    (square=True — обрезает по центру до квадрата max_side x max_side)
+    и пережимает компактно: JPEG, а при прозрачности — WEBP.
+
+    Returns:
+        Кортеж (байты, mime тип).
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img.seek(0) # у анимаций берём первый кадр
+
+        if square:
+            img = ImageOps.fit(img, (max_side, max_side), Image.Resampling.LANCZOS)
+        else:
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        output_buffer = io.BytesIO()
+        if has_alpha:
+            img.convert("RGBA").save(output_buffer, format="WEBP", quality=quality)
+            return output_buffer.getvalue(), "image/webp"
+
+        img.convert("RGB").save(output_buffer, format="JPEG", quality=quality, optimize=True)
+        return output_buffer.getvalue(), "image/jpeg"
+
+async def normalize_image(image_bytes: bytes, max_side: int, square: bool = False) -> tuple[bytes, str | None]:
+    """
+    fit_image в общем пуле для CPU-нагрузки. Если картинку не удалось обработать,
+    возвращает исходные байты и None вместо mime типа.
+    """
+    try:
+        return await run_cpu(fit_image, image_bytes, max_side, square)
+    except Exception as e:
+        logger.warning(f"Не удалось уменьшить картинку: {e}")
+        return image_bytes, None
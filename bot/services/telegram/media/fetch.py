@@ -1,14 +1,101 @@
+import asyncio
+import logging
+from typing import Optional
+
 import aiohttp
-from aiogram import Bot
+from aiogram.types import File
+
+from config import TELEGRAM_TOKEN, MAX_MEDIA_FILE_SIZE, FETCH_TIMEOUT, FETCH_RETRIES, FETCH_CONNECTIONS_LIMIT
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 64 * 1024
+
+# Общая сессия с пулом keep-alive соединений к api.telegram.org
+_session: Optional[aiohttp.ClientSession] = None
+
+
+class FileTooLarge(Exception):
+    """Файл больше допустимого размера."""
+
+
+def _new_session() -> aiohttp.ClientSession:
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=FETCH_CONNECTIONS_LIMIT),
+        timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT),
+    )
+
+
+async def init_session() -> None:
+    """
+    Создаёт общую HTTP сессию для скачивания файлов.
+
+    Вызывается один раз при старте приложения.
+    """
+    global _session
+    _session = _new_session()
+
+
+async def close_session() -> None:
+    """
+    Закрывает общую HTTP сессию.
+
+    Вызывается при завершении работы приложения.
+    """
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+async def _download(sess: aiohttp.ClientSession, url: str, max_size: int) -> bytes:
+    """Читает ответ по частям, прерываясь, как только превышен max_size."""
+    async with sess.get(url) as resp:
+        resp.raise_for_status()
+        if resp.content_length and resp.content_length > max_size:
+            raise FileTooLarge(f"{resp.content_length} > {max_size}")
+
+        buffer = bytearray()
+        async for chunk in resp.content.iter_chunked(_CHUNK_SIZE):
+            buffer.extend(chunk)
+            if len(buffer) > max_size:
+                raise FileTooLarge(f"> {max_size}")
+    return bytes(buffer)
+
+
+async def _download_with_retries(sess: aiohttp.ClientSession, url: str, max_size: int) -> bytes:
+    for attempt in range(FETCH_RETRIES):
+        try:
+            return await _download(sess, url, max_size)
+        except aiohttp.ClientResponseError as e:
+            # Ошибки клиента (404, 400...) повторять бессмысленно
+            if e.status < 500 or attempt == FETCH_RETRIES - 1:
+                raise
+            error = e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == FETCH_RETRIES - 1:
+                raise
+            error = e
+
+        delay = 0.5 * 2 ** attempt
+        logger.warning(f"Ошибка скачивания файла ({error!r}), повтор через {delay} сек.")
+        await asyncio.sleep(delay)
+
+
+async def download_file(file: File, max_size: int = MAX_MEDIA_FILE_SIZE) -> bytes:
+    """
+    Скачивает файл, уже полученный через get_file.
 
-from config import TELEGRAM_TOKEN
+    Raises:
+        FileTooLarge: Если файл больше max_size байт.
+    """
+    if file.file_size and file.file_size > max_size:
+        raise FileTooLarge(f"{file.file_size} > {max_size}")
 
-async def fetch_bytes(bot: Bot, file_id: str) -> bytes:
-    file = await bot.get_file(file_id)
+    url = f"https://api.telegram.org/file/bot{TELEGRAM_TOKEN}/{file.file_path}"
+    if _session is not None:
+        return await _download_with_retries(_session, url, max_size)
 
-    async with aiohttp.ClientSession() as sess:
-        url = f"https://api.telegram.org/file/bot{TELEGRAM_TOKEN}/{file.file_path}"
-        async with sess.get(url) as resp:
-            resp.raise_for_status()
-            bytes = await resp.read()
-    return bytes
+    # Общая сессия не запущена (например, в отдельном скрипте) — одноразовая
+    async with _new_session() as sess:
+        return await _download_with_retries(sess, url, max_size)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    SendMessage, SendPhoto, SendSticker, SendDocument, SendAnimation, SendVideo,
+    SendAudio, SendVoice, SendMediaGroup, CopyMessage, ForwardMessage,
+    EditMessageText, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup
+)
+
+from config import (
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_GROUP_RATE, OUTBOUND_GROUP_BURST,
+    OUTBOUND_PRIVATE_RATE, OUTBOUND_RETRIES, OUTBOUND_CHAT_BUCKETS
+)
+from utils import metrics
+from utils.rate_limit import PriorityTokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета отправки (меньше — раньше)
+INTERACTIVE = 0  # ответы на команды пользователей
+SCHEDULED = 1    # уведомления планировщика (ресты, чистки)
+BULK = 2         # рассылки и созывы
+
+_priority: ContextVar[int] = ContextVar("outbound_priority", default=INTERACTIVE)
+
+# Методы, которые считаются в лимитах Telegram на отправку
+_SEND_METHODS = (
+    SendMessage, SendPhoto, SendSticker, SendDocument, SendAnimation, SendVideo,
+    SendAudio, SendVoice, SendMediaGroup, CopyMessage, ForwardMessage,
+)
+_EDIT_METHODS = (EditMessageText, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup)
+
+
+@contextmanager
+def priority(level: int):
+    """Все отправки внутри блока (и в созданных в нём задачах) идут с приоритетом level."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class OutboundDispatcher(BaseRequestMiddleware):
+    """
+    Мидлварь сессии бота, через которую проходят все отправки и правки сообщений.
+
+    - общий лимит (~30 сообщ./сек) раздаётся по приоритетам: ответы раньше рассылок;
+    - у каждого чата свой лимит (в группах ~20 сообщ./мин), тоже с приоритетами;
+    - из нескольких ожидающих однотипных правок одного сообщения отправляется только последняя,
+      а вытесненные правки возвращают её результат (или её ошибку);
+    - после RetryAfter чат ставится на паузу (а если пауза дольше обычного
+      интервала чата — и весь бот), и запрос повторяется.
+    """
+
+    def __init__(self):
+        self._global = PriorityTokenBucket(rate=OUTBOUND_GLOBAL_RATE)
+        self._chats: dict[int | str, PriorityTokenBucket] = {}
+        self._prune_at = OUTBOUND_CHAT_BUCKETS # размер, при котором выбрасываем простаивающие корзины
+        self._edits: dict[tuple, asyncio.Future] = {} # сообщение -> результат последней правки
+
+        self.sent = 0
+        self.retried = 0
+        self.coalesced = 0
+
+    def _chat_bucket(self, chat_id: int | str) -> PriorityTokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self._prune_at:
+                self._prune_chats()
+            # Отрицательные ID и @username — группы и каналы
+            if isinstance(chat_id, str) or chat_id < 0:
+                bucket = PriorityTokenBucket(rate=OUTBOUND_GROUP_RATE, burst=OUTBOUND_GROUP_BURST)
+            else:
+                bucket = PriorityTokenBucket(rate=OUTBOUND_PRIVATE_RATE)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune_chats(self) -> None:
+        """
+        Выбрасывает корзины простаивающих чатов.
+
+        Корзины с ожидающими, паузой после RetryAfter или неполным запасом остаются:
+        новая полная корзина на их месте позволила бы превысить лимит чата.
+        """
+        self._chats = {chat_id: bucket for chat_id, bucket in self._chats.items() if not bucket.idle}
+        # Если занятых корзин много, следующая чистка — не раньше, чем их станет вдвое больше
+        self._prune_at = max(OUTBOUND_CHAT_BUCKETS, 2 * len(self._chats))
+
+    @staticmethod
+    def _pass_result(source: asyncio.Future, target: asyncio.Future) -> None:
+        """Отдаёт результат правки target вытесненной ею правке source."""
+        if target.done():
+            return # вытесненная правка успела отправиться сама
+        if source.cancelled():
+            target.cancel()
+        elif source.exception() is not None:
+            target.set_exception(source.exception())
+            target.exception() # ошибку уже получил вызывающий последней правки
+        else:
+            target.set_result(source.result())
+
+    async def __call__(self, make_request, bot, method):
+        if not isinstance(method, _SEND_METHODS + _EDIT_METHODS):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+
+        edit_key = done = None
+        if isinstance(method, _EDIT_METHODS):
+            # Сливаем только однотипные правки: новый текст не должен отменять правку клавиатуры
+            edit_key = (type(method), chat_id, method.message_id, method.inline_message_id)
+            done = asyncio.get_running_loop().create_future()
+            previous = self._edits.get(edit_key)
+            if previous is not None:
+                done.add_done_callback(lambda f, previous=previous: self._pass_result(f, previous))
+            self._edits[edit_key] = done
+
+        try:
+            result = await self._send(make_request, bot, method, chat_id, bucket, edit_key, done)
+        except BaseException as e:
+            if done is not None and not done.done():
+                if isinstance(e, asyncio.CancelledError):
+                    done.cancel()
+                else:
+                    done.set_exception(e)
+                    done.exception() # ошибка уходит вызывающему напрямую
+            raise
+        else:
+            if done is not None and not done.done():
+                done.set_result(result)
+            return result
+        finally:
+            if edit_key is not None and self._edits.get(edit_key) is done:
+                del self._edits[edit_key]
+
+    async def _send(self, make_request, bot, method, chat_id, bucket, edit_key, done):
+        level = _priority.get()
+        for attempt in range(OUTBOUND_RETRIES + 1):
+            waited = time.perf_counter()
+            if bucket is not None:
+                await bucket.acquire(level)
+            if edit_key is not None and self._edits.get(edit_key) is not done:
+                # Пока ждали, пришла более новая правка этого же сообщения:
+                # вызывающему отдаём её результат (обычно Message), а не True
+                if bucket is not None:
+                    bucket.refund()
+                self.coalesced += 1
+                try:
+                    return await asyncio.shield(done)
+                finally:
+                    metrics.add_queue_time(time.perf_counter() - waited)
+            await self._global.acquire(level)
+            metrics.add_queue_time(time.perf_counter() - waited)
+
+            try:
+                result = await make_request(bot, method)
+                self.sent += 1
+                return result
+            except TelegramRetryAfter as e:
+                if attempt == OUTBOUND_RETRIES:
+                    raise
+                self.retried += 1
+                logger.warning(f"Rate limit при отправке в чат {chat_id}. Ожидание {e.retry_after} сек.")
+                if bucket is not None:
+                    bucket.hold(e.retry_after)
+                if bucket is None or e.retry_after > 1 / bucket.rate:
+                    # Пауза дольше обычного интервала чата — похоже на общий лимит бота
+                    self._global.hold(e.retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "retried": self.retried,
+            "coalesced": self.coalesced,
+            "waiting": self._global.waiting,
+            "chats": len(self._chats),
+        }
+
+
+# Глобальный диспетчер отправок (подключается к сессии каждого бота)
+dispatcher = OutboundDispatcher()
@@ -1,10 +1,37 @@
+import asyncio
 from typing import Optional
-from aiogram import Bot
+from aiogram import Bot, html
 from aiogram.types import User
 
 from services.telegram.chat_member import get_chat_member
 from db.users import get_uid
-from db.users.nicknames import get_nickname
+from db.users.nicknames import get_nickname, get_nicknames
+
+
+def _format_mention(user_id: Optional[int], nickname: Optional[str], user_entity: Optional[User]) -> str:
+    """
+    Собирает HTML-упоминание из уже полученных данных.
+
+    Args:
+        user_id: ID пользователя (опционально).
+        nickname: Никнейм пользователя в чате (опционально).
+        user_entity: Объект User (опционально).
+
+    Returns:
+        HTML-строка с упоминанием пользователя.
+    """
+    # Если user_entity нет — возвращаем безопасный текст
+    if not user_entity:
+        # Если есть id, пробуем отметить самостоятельно
+        if user_id:
+            return f'<a href="tg://user?id={user_id}">{nickname or f"@{user_id}"}</a>'
+
+        return "неизвестный пользователь"
+
+    # Возвращаем форматированное HTML-упоминание
+    name = nickname or user_entity.full_name or "неизвестный пользователь"
+
+    return user_entity.mention_html(name=name)
 
 
 async def mention_user(
@@ -64,15 +91,77 @@ async def mention_user(
     if user_id:
         nickname = await get_nickname(chat_id=chat_id, user_id=user_id)
 
-    # 5. Если после всего user_entity всё ещё нет — возвращаем безопасный текст
-    if not user_entity:
-        # Если есть id, пробуем отметить самостоятельно
-        if user_id:
-            return f'<a href="tg://user?id={user_id}">{nickname or f"@{user_id}"}</a>'
+    # 5. Возвращаем форматированное HTML-упоминание
+    return _format_mention(user_id, nickname, user_entity)
 
-        return "неизвестный пользователь"
 
-    # 6. Возвращаем форматированное HTML-упоминание
-    name = nickname or user_entity.full_name or "неизвестный пользователь"
+async def mention_users(bot: Bot, chat_id: int, user_ids: list[int]) -> list[str]:
+    """
+    Возвращает HTML-упоминания сразу нескольких пользователей чата.
 
-    return user_entity.mention_html(name=name)
+    Никнеймы получаются одним запросом к БД, а участники чата
+    запрашиваются параллельно (через кэш участников).
+
+    Args:
+        bot: Экземпляр бота.
+        chat_id: ID чата.
+        user_ids: Список ID пользователей.
+
+    Returns:
+        Список HTML-упоминаний в том же порядке, что и user_ids.
+    """
+    if not user_ids:
+        return []
+
+    unique_ids = list(dict.fromkeys(int(uid) for uid in user_ids))
+
+    nicknames, members = await asyncio.gather(
+        get_nicknames(chat_id=chat_id, user_ids=unique_ids),
+        asyncio.gather(*(
+            get_chat_member(bot=bot, chat_id=chat_id, user_id=uid)
+            for uid in unique_ids
+        ))
+    )
+    entities = {
+        uid: member.user if member else None
+        for uid, member in zip(unique_ids, members)
+    }
+
+    return [
+        _format_mention(int(uid), nicknames.get(int(uid)), entities[int(uid)])
+        for uid in user_ids
+    ]
+
+
+async def resolve_mention_names(bot: Bot, chat_id: int, user_ids: list[int]) -> list[tuple[int, str]]:
+    """
+    Возвращает (user_id, отображаемое имя) для большого списка пользователей.
+
+    В отличие от mention_users, участники чата запрашиваются
+    только для тех, у кого нет никнейма в БД.
+
+    Args:
+        bot: Экземпляр бота.
+        chat_id: ID чата.
+        user_ids: Список ID пользователей.
+
+    Returns:
+        Список пар в том же порядке, что и user_ids.
+    """
+    user_ids = [int(uid) for uid in user_ids]
+    nicknames = await get_nicknames(chat_id=chat_id, user_ids=list(dict.fromkeys(user_ids)))
+
+    missing = [uid for uid in dict.fromkeys(user_ids) if not nicknames.get(uid)]
+    members = await asyncio.gather(*(
+        get_chat_member(bot=bot, chat_id=chat_id, user_id=uid)
+        for uid in missing
+    ))
+    for uid, member in zip(missing, members):
+        nicknames[uid] = member.user.full_name if member else None
+
+    return [(uid, nicknames.get(uid) or f"@{uid}") for uid in user_ids]
+
+
+def format_mention_link(user_id: int, name: str) -> str:
+    """HTML-упоминание по ID без запроса участника (имя экранируется)."""
+    return f'<a href="tg://user?id={user_id}">{html.quote(name)}</a>'
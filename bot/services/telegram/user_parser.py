@@ -1,5 +1,5 @@
 import logging
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 
 from aiogram import Bot
 from aiogram.types import Message, User
@@ -57,6 +57,28 @@ async def parse_user_mention(bot: Bot, msg: Message) -> Optional[User]:
     return None
 
 
+def iter_texts_without_mention(msg: Message) -> Iterator[str]:
+    """
+    Перебирает варианты текста сообщения без одного из упоминаний.
+
+    Не обращается ни к БД, ни к Telegram API: нужно, чтобы заранее понять,
+    может ли текст после удаления упоминания оказаться РП командой.
+
+    Args:
+        msg: Сообщение для парсинга.
+
+    Yields:
+        Текст сообщения с вырезанным упоминанием (по одному на каждое упоминание).
+    """
+    if not msg.entities or not msg.text:
+        return
+
+    for entity in msg.entities:
+        if entity.type in ("mention", "text_mention"):
+            start, end = entity.offset, entity.offset + entity.length
+            yield (msg.text[:start] + msg.text[end:]).strip()
+
+
 async def parse_user_mention_and_clean_text(
     bot: Bot,
     msg: Message
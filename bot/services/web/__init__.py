@@ -1,33 +1,269 @@
-from playwright.async_api import async_playwright
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
 
-async def screenshot(html_body: str, template: str, core_element_name: str) -> bytes:
-    """Преобразует HTML в изображение(bytes) с помощью headless браузера."""
-    # подставляем данные
-    html_code = (
-        template
-        .replace("{{ data }}", html_body)
-    )
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+from config import (
+    QUOTE_TEMPLATE, FAMILY_TEMPLATE, ACTIVITY_CHART_TEMPLATE,
+    RENDERER_POOL_SIZE, RENDERER_MAX_RENDERS_PER_PAGE, RENDERER_TIMEOUT
+)
+
+from services.web.render_cache import render_cache, make_key
+
+logger = logging.getLogger(__name__)
+
+# Маркер, на место которого вставляется содержимое в прогретой странице
+_RENDER_SLOT = "<!-- render-slot -->"
+
+_BROWSER_ARGS = ["--disable-gpu", "--no-sandbox"]
+_CONTEXT_OPTIONS = {
+    "viewport": {"width": 1920, "height": 1080},
+    "device_scale_factor": 2,
+}
+
+# Находит родителя маркера и запоминает его как слот для рендера
+_FIND_SLOT_JS = """
+() => {
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_COMMENT);
+    while (walker.nextNode()) {
+        if (walker.currentNode.nodeValue.trim() === "render-slot") {
+            window.__renderSlot = walker.currentNode.parentNode;
+            return true;
+        }
+    }
+    return false;
+}
+"""
+
+# Подставляет содержимое в слот и ждёт декодирования картинок и шрифтов
+_FILL_SLOT_JS = """
+async (html) => {
+    window.__renderSlot.innerHTML = html;
+    const images = Array.from(window.__renderSlot.querySelectorAll("img"));
+    await Promise.all(images.map(img => img.decode().catch(() => null)));
+    await document.fonts.ready;
+}
+"""
+
+
+class _PooledPage:
+    """Прогретая страница с загруженным шаблоном."""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.template: Optional[str] = None
+        self.has_slot = False
+        self.renders = 0
+
+    async def load_template(self, template: str) -> None:
+        """Загружает шаблон в страницу и ищет в нём слот для содержимого."""
+        await self.page.set_content(template.replace("{{ data }}", _RENDER_SLOT))
+        self.has_slot = bool(await self.page.evaluate(_FIND_SLOT_JS))
+        self.template = template
+
+    async def is_healthy(self) -> bool:
+        """Проверяет, что страница жива и отвечает."""
+        if self.page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(self.page.evaluate("1"), timeout=RENDERER_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    async def close(self) -> None:
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
+
+class Renderer:
+    """
+    Долгоживущий пул прогретых страниц Chromium.
+
+    Держит один браузер и ограниченное количество страниц с уже загруженными
+    шаблонами. Количество одновременных рендеров ограничено размером пула,
+    а страница пересоздаётся после max_renders рендеров, чтобы утечки памяти
+    в Chromium оставались ограниченными.
+    """
+
+    def __init__(self, pool_size: int = RENDERER_POOL_SIZE,
+                 max_renders: int = RENDERER_MAX_RENDERS_PER_PAGE):
+        self.pool_size = pool_size
+        self.max_renders = max_renders
+
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._browser_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(pool_size)
+        self._idle: list[_PooledPage] = []
+
+    async def start(self) -> None:
+        """Запускает браузер и прогревает страницы с шаблонами."""
+        self._playwright = await async_playwright().start()
+        await self._launch_browser()
+
+        templates = [QUOTE_TEMPLATE, FAMILY_TEMPLATE, ACTIVITY_CHART_TEMPLATE]
+        for i in range(self.pool_size):
+            pooled = await self._new_page()
+            await pooled.load_template(templates[i % len(templates)])
+            self._idle.append(pooled)
+
+    async def close(self) -> None:
+        """Закрывает все страницы, браузер и playwright."""
+        for pooled in self._idle:
+            await pooled.close()
+        self._idle.clear()
+
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch_browser(self) -> None:
+        self._browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=_BROWSER_ARGS
+        )
+
+    async def _ensure_browser(self) -> Browser:
+        """Перезапускает браузер, если он упал."""
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                logger.warning("♻️ Браузер рендерера недоступен, перезапускаем")
+                await self._launch_browser()
+            return self._browser
 
-    # Рендеринг через Playwright
+    async def _new_page(self) -> _PooledPage:
+        browser = await self._ensure_browser()
+        context = await browser.new_context(**_CONTEXT_OPTIONS)
+        page = await context.new_page()
+        return _PooledPage(context, page)
+
+    def _take_idle(self, template: str) -> Optional[_PooledPage]:
+        """Забирает свободную страницу, предпочитая ту, где уже загружен нужный шаблон."""
+        for i, pooled in enumerate(self._idle):
+            if pooled.template == template:
+                return self._idle.pop(i)
+        return self._idle.pop() if self._idle else None
+
+    @asynccontextmanager
+    async def _page(self, template: str):
+        async with self._semaphore:
+            pooled = self._take_idle(template)
+            if pooled is None or not await pooled.is_healthy():
+                if pooled is not None:
+                    await pooled.close()
+                pooled = await self._new_page()
+
+            try:
+                yield pooled
+            except Exception:
+                # Страница могла остаться в неизвестном состоянии — не возвращаем её в пул
+                await pooled.close()
+                raise
+
+            pooled.renders += 1
+            if pooled.renders >= self.max_renders:
+                await pooled.close()
+                pooled = await self._new_page()
+                await pooled.load_template(template)
+            self._idle.append(pooled)
+
+    async def screenshot(self, html_body: str, template: str, core_element_name: str) -> bytes:
+        async with self._page(template) as pooled:
+            if pooled.template != template:
+                await pooled.load_template(template)
+
+            if pooled.has_slot:
+                await asyncio.wait_for(
+                    pooled.page.evaluate(_FILL_SLOT_JS, html_body),
+                    timeout=RENDERER_TIMEOUT
+                )
+            else:
+                # В шаблоне нет слота — загружаем страницу целиком
+                await pooled.page.set_content(template.replace("{{ data }}", html_body))
+                pooled.template = None
+
+            element = pooled.page.locator(core_element_name)
+            return await element.screenshot(omit_background=True)
+
+
+# Глобальный рендерер
+renderer: Optional[Renderer] = None
+
+
+async def init_renderer() -> None:
+    """
+    Запускает глобальный пул страниц для рендеринга.
+
+    Вызывается один раз при старте приложения.
+    """
+    global renderer
+    renderer = Renderer()
+    await renderer.start()
+    logger.info(f"🖼 Рендерер запущен ({renderer.pool_size} стр.)")
+
+
+async def close_renderer() -> None:
+    """
+    Останавливает глобальный пул страниц для рендеринга.
+
+    Вызывается при завершении работы приложения.
+    """
+    global renderer
+    if renderer is not None:
+        await renderer.close()
+        renderer = None
+        logger.info("🔒 Рендерер остановлен")
+
+
+async def _screenshot_once(html_code: str, core_element_name: str) -> bytes:
+    """Одноразовый рендер в отдельном браузере (если пул не запущен)."""
     async with async_playwright() as p:
         browser = await p.chromium.launch(
             headless=True,
-            args=["--disable-gpu", "--no-sandbox"]
+            args=_BROWSER_ARGS
         )
 
-        context = await browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            device_scale_factor=2
-        )
+        context = await browser.new_context(**_CONTEXT_OPTIONS)
         page = await context.new_page()
-        
+
         # Устанавливаем HTML
         await page.set_content(html_code)
 
         # Находим элемент и делаем скриншот
         element = page.locator(core_element_name)
         screenshot_bytes = await element.screenshot(omit_background=True)
-        
+
         await browser.close()
 
-    return screenshot_bytes
\ No newline at end of file
+    return screenshot_bytes
+
+
+async def screenshot(html_body: str, template: str, core_element_name: str) -> bytes:
+    """Преобразует HTML в изображение(bytes) с помощью headless браузера."""
+    # Одинаковый HTML даёт одинаковую картинку — отдаём её из кэша
+    key = make_key(template, core_element_name, html_body)
+    cached = await render_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if renderer is not None:
+        image = await renderer.screenshot(html_body, template, core_element_name)
+    else:
+        # подставляем данные
+        html_code = (
+            template
+            .replace("{{ data }}", html_body)
+        )
+        image = await _screenshot_once(html_code, core_element_name)
+
+    await render_cache.set(key, image)
+    return image
@@ -1,30 +1,44 @@
-from config import ACTIVITY_CHART_TEMPLATE
+import io
+import logging
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+from config import ACTIVITY_CHART_TEMPLATE, ACTIVITY_CHART_NATIVE
 from services.web import screenshot
+from services.web.render_cache import render_cache, make_key
+from services.executor import run_cpu
 
+logger = logging.getLogger(__name__)
 
-async def make_activity_chart(stats):
+
+def _activity_level(count: int, max_count: int) -> int:
+    """Уровень яркости ячейки (от 1 до 4)."""
+    ratio = count / (max_count or 1) # у пустой статистики максимум 0
+    if ratio > 0.75: return 4
+    elif ratio > 0.4: return 3
+    elif ratio > 0.15: return 2
+    else: return 1
+
+
+async def make_activity_chart_html(stats):
+    """Рендер графика через шаблон activity_chart.html и браузер."""
     total_messages = sum(item['count'] for item in stats)
     max_count = max(item['count'] for item in stats) if stats else 1
-    
+
     # Генерация ячеек (Logic)
     cells_html = ""
     for item in stats:
         count = item['count']
         date_str = item['date'].strftime("%d.%m.%y")
-        
-        # Расчет уровня яркости (от 1 до 4)
-        ratio = count / max_count
-        if ratio > 0.75: lvl = 4
-        elif ratio > 0.4: lvl = 3
-        elif ratio > 0.15: lvl = 2
-        else: lvl = 1
-        
+        lvl = _activity_level(count, max_count)
+
         cells_html += f"""
         <div class="day-cell lvl-{lvl}">
             <span class="count">{count}</span>
             <span class="date">{date_str}</span>
         </div>"""
-    
+
     html_body = f"""
     <div class="screenshot-wrapper" style="padding: 20px;">
         <div class="card">
@@ -49,3 +63,175 @@ async def make_activity_chart(stats):
     """
 
     return await screenshot(html_body, ACTIVITY_CHART_TEMPLATE, ".screenshot-wrapper")
+
+
+# Нативный рендер повторяет вёрстку activity_chart.html (размеры в CSS пикселях)
+_SCALE = 2 # как device_scale_factor у браузера
+
+_BG = (14, 22, 33)          # --bg
+_CARD = (23, 33, 43)        # --card
+_TEXT = (255, 255, 255)     # --text
+_SUB = (112, 132, 153)      # --sub
+_ACCENT = (51, 144, 236)    # --accent
+_DIVIDER = (35, 46, 60)
+_LEVELS = [(28, 39, 50), (32, 64, 90), (40, 90, 136), (46, 116, 179), (51, 144, 236)] # --l0..--l4
+
+_WRAPPER_PADDING = 20
+_CARD_PADDING = 30
+_CARD_WIDTH = 850
+_CARD_RADIUS = 20
+_HEADER_PADDING = 15
+_HEADER_MARGIN = 25
+_CELL_MIN = 45
+_CELL_GAP = 8
+_CELL_RADIUS = 8
+_FOOTER_MARGIN = 25
+_LEGEND_SIZE = 12
+_LEGEND_RADIUS = 3
+_LEGEND_GAP = 8
+
+# Шрифты из fonts-liberation (ставятся в Dockerfile), DejaVu — запасной вариант
+_FONT_PATHS = {
+    False: [
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    ],
+    True: [
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def _font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    for path in _FONT_PATHS[bold]:
+        try:
+            return ImageFont.truetype(path, size * _SCALE)
+        except OSError:
+            continue
+    return ImageFont.load_default(size * _SCALE)
+
+
+def _blend(color: tuple, over: tuple, alpha: float) -> tuple:
+    """Цвет over с прозрачностью alpha поверх color."""
+    return tuple(round(c * (1 - alpha) + o * alpha) for c, o in zip(color, over))
+
+
+def _text_size(draw: ImageDraw.ImageDraw, text: str, font) -> tuple[int, int]:
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    return right - left, bottom - top
+
+
+def draw_activity_chart(stats) -> bytes:
+    """Рисует график активности средствами Pillow и возвращает PNG."""
+    s = _SCALE
+    total_messages = sum(item['count'] for item in stats)
+    max_count = max(item['count'] for item in stats) if stats else 1
+
+    # Сетка: repeat(auto-fill, minmax(45px, 1fr))
+    columns = (_CARD_WIDTH + _CELL_GAP) // (_CELL_MIN + _CELL_GAP)
+    cell = (_CARD_WIDTH - (columns - 1) * _CELL_GAP) / columns
+    rows = -(-len(stats) // columns)
+    grid_height = rows * cell + max(rows - 1, 0) * _CELL_GAP
+
+    title_font, total_font = _font(22, bold=True), _font(16)
+    count_font, date_font = _font(14, bold=True), _font(9)
+    footer_font = _font(12)
+
+    header_height = 26 + _HEADER_PADDING + 1
+    footer_height = 14
+    card_height = (
+        _CARD_PADDING + header_height + _HEADER_MARGIN + grid_height
+        + _FOOTER_MARGIN + footer_height + _CARD_PADDING
+    )
+    width = _CARD_WIDTH + 2 * (_CARD_PADDING + _WRAPPER_PADDING)
+    height = card_height + 2 * _WRAPPER_PADDING
+
+    img = Image.new("RGB", (round(width * s), round(height * s)), _BG)
+    draw = ImageDraw.Draw(img)
+
+    # Карточка
+    card_x, card_y = _WRAPPER_PADDING, _WRAPPER_PADDING
+    draw.rounded_rectangle(
+        (card_x * s, card_y * s, (width - _WRAPPER_PADDING) * s, (height - _WRAPPER_PADDING) * s),
+        radius=_CARD_RADIUS * s, fill=_CARD
+    )
+    left = card_x + _CARD_PADDING
+    right = left + _CARD_WIDTH
+    y = card_y + _CARD_PADDING
+
+    # Шапка: заголовок слева, итог справа (по нижнему краю)
+    header_bottom = y + header_height - _HEADER_PADDING - 1
+    draw.text((left * s, header_bottom * s), "Статистика активности",
+              font=title_font, fill=_TEXT, anchor="ls")
+    draw.text((right * s, header_bottom * s), f"Всего {total_messages} сообщ.",
+              font=total_font, fill=_ACCENT, anchor="rs")
+    divider_y = y + header_height - 1
+    draw.rectangle((left * s, divider_y * s, right * s, (divider_y + 1) * s - 1), fill=_DIVIDER)
+    y += header_height + _HEADER_MARGIN
+
+    # Ячейки по дням
+    for i, item in enumerate(stats):
+        row, col = divmod(i, columns)
+        x0 = left + col * (cell + _CELL_GAP)
+        y0 = y + row * (cell + _CELL_GAP)
+        lvl = _activity_level(item['count'], max_count)
+        background = _LEVELS[lvl]
+
+        draw.rounded_rectangle(
+            (x0 * s, y0 * s, (x0 + cell) * s, (y0 + cell) * s),
+            radius=_CELL_RADIUS * s, fill=background
+        )
+
+        count_text = str(item['count'])
+        date_text = item['date'].strftime("%d.%m.%y")
+        _, count_h = _text_size(draw, count_text, count_font)
+        _, date_h = _text_size(draw, date_text, date_font)
+        block_top = (y0 + cell / 2) * s - (count_h + 2 * s + date_h) / 2
+        center_x = (x0 + cell / 2) * s
+
+        draw.text((center_x, block_top), count_text, font=count_font, fill=_TEXT, anchor="mt")
+        draw.text((center_x, block_top + count_h + 2 * s), date_text,
+                  font=date_font, fill=_blend(background, _TEXT, 0.4), anchor="mt")
+    y += grid_height + _FOOTER_MARGIN
+
+    # Легенда справа: "Меньше" [l0..l4] "Больше"
+    center_y = (y + footer_height / 2) * s
+    x = right * s
+    x -= _text_size(draw, "Больше", footer_font)[0]
+    draw.text((x, center_y), "Больше", font=footer_font, fill=_SUB, anchor="lm")
+    for color in reversed(_LEVELS):
+        x -= (_LEGEND_GAP + _LEGEND_SIZE) * s
+        draw.rounded_rectangle(
+            (x, center_y - _LEGEND_SIZE * s / 2, x + _LEGEND_SIZE * s, center_y + _LEGEND_SIZE * s / 2),
+            radius=_LEGEND_RADIUS * s, fill=color
+        )
+    x -= _LEGEND_GAP * s
+    draw.text((x, center_y), "Меньше", font=footer_font, fill=_SUB, anchor="rm")
+
+    output = io.BytesIO()
+    # Telegram всё равно пережимает фото, поэтому экономим время, а не байты
+    img.save(output, format="PNG", compress_level=1)
+    return output.getvalue()
+
+
+async def make_activity_chart(stats):
+    """
+    Рисует график активности пользователя (PNG).
+    По умолчанию — без браузера, через Pillow; при ошибке — через HTML шаблон.
+    """
+    if ACTIVITY_CHART_NATIVE:
+        key = make_key("activity_chart", *(f"{item['date']}:{item['count']}" for item in stats))
+        cached = await render_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            image = await run_cpu(draw_activity_chart, stats)
+            await render_cache.set(key, image)
+            return image
+        except Exception as e:
+            logger.warning(f"Нативный рендер графика активности не удался, рендерим через браузер: {e}")
+
+    return await make_activity_chart_html(stats)
@@ -1,10 +1,13 @@
 import base64
 import html
+import asyncio
 from itertools import groupby
 from typing import Optional
 
 from services.web import screenshot
-from config import QUOTE_TEMPLATE
+from services.executor import run_cpu
+from services.telegram.media.convert import normalize_image
+from config import QUOTE_TEMPLATE, QUOTE_MEDIA_SIZE, QUOTE_AVATAR_SIZE
 
 
 # Constants
@@ -70,7 +73,7 @@ def encode_media_as_data_url(media: dict) -> str:
     return f"data:{media['type']};base64,{encoded}"
 
 
-def create_avatar_html(avatar: Optional[bytes], name: str) -> tuple[str, str]:
+def create_avatar_html(avatar: Optional[bytes], name: str, avatar_type: str = "image/jpeg") -> tuple[str, str]:
     """
     Create avatar HTML and styling.
     
@@ -79,7 +82,7 @@ def create_avatar_html(avatar: Optional[bytes], name: str) -> tuple[str, str]:
     """
     if avatar:
         encoded_avatar = base64.b64encode(avatar).decode('utf-8')
-        avatar_html = f'<img src="data:image/jpeg;base64,{encoded_avatar}" alt="avatar" />'
+        avatar_html = f'<img src="data:{avatar_type};base64,{encoded_avatar}" alt="avatar" />'
         styling = ''
     else:
         avatar_html = escape_html(name[0].upper())
@@ -115,7 +118,8 @@ def create_message_bubble(material: list, is_first: bool = True) -> str:
     if is_first:
         avatar_html, styling = create_avatar_html(
             material.get('avatar'), 
-            material['name']
+            material['name'],
+            material.get('avatar_type') or "image/jpeg"
         )
         name = escape_html(material['name'])
         
@@ -152,22 +156,49 @@ def validate_materials(materials: list) -> None:
             raise ValueError(f"Material at index {idx} missing required 'text' key")
 
 
-async def make_quote(materials: list) -> bytes:
+async def normalize_materials(materials: list) -> list:
     """
-    Create a quote screenshot from message materials.
+    Downscale avatars and images to their display size before embedding.
+
+    Full-size photos would otherwise be base64-encoded into the HTML
+    and decoded by the browser just to be shown at 250px.
+    """
+    # The same avatar often repeats across messages — process it once
+    avatars: dict[int, asyncio.Future] = {}
+
+    async def normalize_avatar(avatar: bytes) -> tuple[bytes, str | None]:
+        key = id(avatar)
+        if key not in avatars:
+            avatars[key] = asyncio.ensure_future(normalize_image(avatar, QUOTE_AVATAR_SIZE, square=True))
+        return await avatars[key]
+
+    async def normalize(material: dict) -> dict:
+        material = dict(material)
+
+        avatar = material.get('avatar')
+        if avatar:
+            material['avatar'], material['avatar_type'] = await normalize_avatar(avatar)
+
+        media = material.get('media')
+        if media and media['type'].startswith("image/"):
+            source, mime_type = await normalize_image(media['source'], QUOTE_MEDIA_SIZE)
+            material['media'] = {"source": source, "type": mime_type or media['type']}
+
+        return material
+
+    return list(await asyncio.gather(*(normalize(m) for m in materials)))
+
+
+def build_quote_html(materials: list) -> str:
+    """
+    Build the quote HTML (base64-encodes all images, so it is CPU-bound).
     
     Args:
-        materials: List of message dictionaries containing name, text, 
-                   and optionally avatar and media
+        materials: List of validated message dictionaries
     
     Returns:
-        Screenshot bytes of the rendered quote
-        
-    Raises:
-        ValueError: If materials are invalid or empty
+        HTML string to be inserted into the quote template
     """
-    validate_materials(materials)
-    
     html_parts = []
     
     # Group consecutive messages by sender name
@@ -190,7 +221,26 @@ async def make_quote(materials: list) -> bytes:
             )
             html_parts.append(additional_html)
     
-    quote_content = ''.join(html_parts)
+    return ''.join(html_parts)
+
+
+async def make_quote(materials: list) -> bytes:
+    """
+    Create a quote screenshot from message materials.
+    
+    Args:
+        materials: List of message dictionaries containing name, text, 
+                   and optionally avatar and media
+    
+    Returns:
+        Screenshot bytes of the rendered quote
+        
+    Raises:
+        ValueError: If materials are invalid or empty
+    """
+    validate_materials(materials)
+    materials = await normalize_materials(materials)
+    quote_content = await run_cpu(build_quote_html, materials)
     
     # Take screenshot (assuming this function exists in your codebase)
     screenshot_bytes = await screenshot(quote_content, QUOTE_TEMPLATE, ".chat-container")
@@ -0,0 +1,57 @@
+import hashlib
+
+from aiogram.types import BufferedInputFile, Message
+
+from config import (
+    RENDER_CACHE_MAX_BYTES, RENDER_CACHE_DIR, RENDER_CACHE_DISK_MAX_BYTES,
+    RENDER_FILE_ID_CACHE_SIZE
+)
+from utils.cache import TTLCache, ByteCache, MISSING
+
+
+def make_key(*parts: str | bytes) -> str:
+    """Ключ рендера — хэш всего, от чего зависит картинка (шаблон, HTML, ...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8") if isinstance(part, str) else part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Глобальный кэш рендеров
+render_cache = ByteCache(
+    max_bytes=RENDER_CACHE_MAX_BYTES,
+    directory=RENDER_CACHE_DIR,
+    disk_max_bytes=RENDER_CACHE_DISK_MAX_BYTES
+)
+
+# Хэш картинки -> file_id в Telegram после первой загрузки
+_file_ids = TTLCache(maxsize=RENDER_FILE_ID_CACHE_SIZE)
+
+
+def as_input_file(data: bytes, filename: str) -> str | BufferedInputFile:
+    """
+    Возвращает file_id уже загруженной в Telegram такой же картинки,
+    а если её ещё не загружали — файл для загрузки.
+    """
+    file_id = _file_ids.get(make_key(data))
+    if file_id is not MISSING:
+        return file_id
+    return BufferedInputFile(data, filename=filename)
+
+
+def remember_file_id(input_file: str | BufferedInputFile, sent: Message | bool | None) -> None:
+    """Запоминает file_id, который Telegram выдал за загруженную картинку."""
+    if not isinstance(input_file, BufferedInputFile) or not isinstance(sent, Message):
+        return
+
+    if sent.photo:
+        file_id = sent.photo[-1].file_id
+    elif sent.sticker:
+        file_id = sent.sticker.file_id
+    elif sent.document:
+        file_id = sent.document.file_id
+    else:
+        return
+
+    _file_ids.set(make_key(input_file.data), file_id)
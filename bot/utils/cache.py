@@ -0,0 +1,202 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Маркер отсутствия значения (чтобы отличать промах от закэшированного None)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU-кэш с ограниченным размером и временем жизни записей.
+
+    При превышении maxsize вытесняются давно не использованные записи,
+    записи старше ttl секунд считаются отсутствующими (ttl=None — без срока).
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Возвращает значение по ключу или default, если его нет или оно устарело."""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Сохраняет значение (ttl переопределяет время жизни для этой записи)."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Удаляет запись по ключу."""
+        self._data.pop(key, None)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Удаляет все записи, ключи которых подходят под условие."""
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Статистика попаданий в кэш."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class ByteCache:
+    """
+    Кэш бинарных данных (картинок, файлов) с ограничением по объёму.
+
+    В памяти держит данные в пределах max_bytes (LRU). Если задан каталог,
+    данные также сохраняются на диск (LRU, до disk_max_bytes) и переживают
+    перезапуск: при промахе в памяти запись поднимается с диска.
+    """
+
+    def __init__(self, max_bytes: int, directory: Optional[str] = None,
+                 disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: Optional[OrderedDict[str, int]] = None # имя файла -> размер
+        self._disk_bytes = 0
+        self._disk_lock = asyncio.Lock() # работа с диском идёт в потоках — по одной операции
+
+    def _path(self, key: Hashable) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def _load_disk_index(self) -> OrderedDict[str, int]:
+        """Индекс файлов на диске (строится один раз, от старых к новым)."""
+        if self._disk is None:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".bin"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+
+            self._disk = OrderedDict((key, size) for _, key, size in sorted(entries))
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _read_disk(self, key: Hashable) -> Optional[bytes]:
+        disk = self._load_disk_index()
+        name = str(key)
+        if name not in disk:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            self._disk_bytes -= disk.pop(name)
+            return None
+        disk.move_to_end(name)
+        return data
+
+    def _write_disk(self, key: Hashable, data: bytes) -> None:
+        disk = self._load_disk_index()
+        if len(data) > self.disk_max_bytes:
+            return
+        try:
+            with open(self._path(key), "wb") as f:
+                f.write(data)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить {key} на диск: {e}")
+            return
+        self._disk_bytes += len(data) - disk.pop(str(key), 0)
+        disk[str(key)] = len(data)
+
+        while self._disk_bytes > self.disk_max_bytes and disk:
+            key, size = disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _put_memory(self, key: Hashable, data: bytes) -> None:
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+
+        while self._memory_bytes > self.max_bytes and self._memory:
+            _, old_data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old_data)
+
+    async def get(self, key: Hashable) -> Optional[bytes]:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return data
+
+        if self.directory:
+            async with self._disk_lock:
+                data = await asyncio.to_thread(self._read_disk, key)
+            if data is not None:
+                self.hits += 1
+                self._put_memory(key, data)
+                return data
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: Hashable, data: bytes) -> None:
+        self._put_memory(key, data)
+        if self.directory:
+            async with self._disk_lock:
+                await asyncio.to_thread(self._write_disk, key, data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "memory_items": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_items": len(self._disk) if self._disk is not None else 0,
+            "disk_bytes": self._disk_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,48 @@
+from typing import Optional
+
+# Ключ узла префиксного дерева, под которым лежит (команда, шаблон)
+_TERMINAL = ""
+
+
+class CommandTrie:
+    """
+    Префиксное дерево РП команд.
+
+    Поиск команды в начале строки стоит O(длина префикса сообщения)
+    и не зависит от количества команд.
+    """
+
+    def __init__(self, commands: dict[str, str]):
+        self._root: dict = {}
+        for command, template in commands.items():
+            self.add(command, template)
+
+    def add(self, command: str, template: str) -> None:
+        node = self._root
+        for char in command.lower():
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = (command.lower(), template)
+
+    def match(self, text: str) -> Optional[tuple[str, str, int]]:
+        """
+        Ищет самую длинную команду в начале text, после которой идёт пробел или конец строки
+        (чтобы "чмок" не сработало на "чмокнуть", а "поцеловать" — раньше "жарко поцеловать").
+
+        Returns:
+            Кортеж (команда, шаблон, позиция конца команды в text) или None.
+        """
+        node = self._root
+        best = None
+
+        for pos, char in enumerate(text):
+            for lowered in char.lower():
+                node = node.get(lowered)
+                if node is None:
+                    return best
+
+            terminal = node.get(_TERMINAL)
+            end = pos + 1
+            if terminal and (end == len(text) or text[end].isspace()):
+                best = (terminal[0], terminal[1], end)
+
+        return best
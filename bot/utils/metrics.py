@@ -0,0 +1,121 @@
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Границы корзин гистограмм (сек), как у Prometheus
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # последняя корзина — всё, что больше
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля: линейная интерполяция внутри корзины."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+
+class UpdateTimings:
+    """Время, потраченное на обработку одного апдейта."""
+
+    def __init__(self, event_type: str):
+        self.event_type = event_type
+        self.router = "-"
+        self.handler = "-"
+        self.db = 0.0
+        self.api = 0.0
+        self.queue = 0.0 # ожидание в очереди отправки (лимиты и RetryAfter)
+        self.started = time.perf_counter()
+
+
+# Апдейт, который обрабатывается в текущей задаче
+current_update: ContextVar[Optional[UpdateTimings]] = ContextVar("current_update", default=None)
+
+# (тип события, роутер, хендлер) -> длительность обработки
+handler_latency: dict[tuple[str, str, str], Histogram] = {}
+# Время в БД, в Telegram API и в очереди отправки за апдейт
+update_db_time = Histogram()
+update_api_time = Histogram()
+update_queue_time = Histogram()
+# Лаг event loop
+loop_lag = Histogram(buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+def add_db_time(seconds: float) -> None:
+    update = current_update.get()
+    if update is not None:
+        update.db += seconds
+
+
+def add_api_time(seconds: float) -> None:
+    update = current_update.get()
+    if update is not None:
+        update.api += seconds
+
+
+def add_queue_time(seconds: float) -> None:
+    update = current_update.get()
+    if update is not None:
+        update.queue += seconds
+
+
+def finish_update(update: UpdateTimings) -> None:
+    """Записывает длительность обработки апдейта в гистограммы."""
+    elapsed = time.perf_counter() - update.started
+    key = (update.event_type, update.router, update.handler)
+    handler_latency.setdefault(key, Histogram()).observe(elapsed)
+    update_db_time.observe(update.db)
+    update_api_time.observe(update.api)
+    update_queue_time.observe(update.queue)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}"
+
+
+def _percentiles(histogram: Histogram) -> str:
+    return (
+        f"p50 {_ms(histogram.quantile(0.5))} | p95 {_ms(histogram.quantile(0.95))} | "
+        f"p99 {_ms(histogram.quantile(0.99))} мс (n={histogram.count})"
+    )
+
+
+def summary(limit: int = 15) -> str:
+    """Текстовая сводка p50/p95/p99 по самым медленным хендлерам."""
+    lines = [
+        f"Лаг event loop: {_percentiles(loop_lag)}",
+        f"БД за апдейт: {_percentiles(update_db_time)}",
+        f"Telegram API за апдейт: {_percentiles(update_api_time)}",
+        f"Очередь отправки за апдейт: {_percentiles(update_queue_time)}",
+        "",
+    ]
+
+    slowest = sorted(handler_latency.items(), key=lambda item: item[1].quantile(0.95), reverse=True)
+    for (event_type, router, handler), histogram in slowest[:limit]:
+        lines.append(f"{event_type} {router}.{handler}: {_percentiles(histogram)}")
+
+    return "\n".join(lines)
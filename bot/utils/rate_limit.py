@@ -0,0 +1,87 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Optional
+
+
+class PriorityTokenBucket:
+    """
+    Ограничитель частоты: в среднем не больше rate операций в секунду,
+    с запасом до burst операций подряд.
+
+    При нехватке токенов выдаёт их сначала более приоритетным ожидающим
+    (меньшее число — выше приоритет). hold() приостанавливает выдачу
+    (например, по RetryAfter от Telegram).
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.resume_at = 0.0
+
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def idle(self) -> bool:
+        """Никто не ждёт, паузы нет и запас полон — замена новой корзиной ничего не изменит."""
+        now = time.monotonic()
+        return (
+            not self._waiters
+            and now >= self.resume_at
+            and self.tokens + (now - self.updated) * self.rate >= self.capacity
+        )
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def refund(self) -> None:
+        """Возвращает токен, если операция так и не была выполнена."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def hold(self, seconds: float) -> None:
+        """Не выдавать токены ближайшие seconds секунд."""
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    async def acquire(self, priority: int = 0) -> None:
+        """Ждёт токен в очереди с приоритетом priority."""
+        now = time.monotonic()
+        if not self._waiters and now >= self.resume_at:
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run_pump())
+        await future
+
+    async def _run_pump(self) -> None:
+        """Раздаёт токены ожидающим по мере их пополнения."""
+        while self._waiters:
+            now = time.monotonic()
+            if now < self.resume_at:
+                await asyncio.sleep(self.resume_at - now)
+                continue
+
+            self._refill(now)
+            while self.tokens >= 1 and self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if future.done():
+                    continue # ожидающего отменили
+                self.tokens -= 1
+                future.set_result(None)
+
+            if self._waiters:
+                await asyncio.sleep((1 - self.tokens) / self.rate)